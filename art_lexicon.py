@@ -0,0 +1,206 @@
+import re
+
+# Canonical English search keyword -> names/words in English, Russian and German.
+# Entries are stemmed when the index is built, so one form per word is enough
+# in most cases. Aliases that are everyday words in another of the languages
+# (German "Kind", "Boot", "rot" read as English) are left out: a query like
+# "some kind of landscape" must not match them, so the model handles those.
+ARTISTS = {
+    'van gogh': ['van gogh', 'vincent van gogh', 'ван гог', 'винсент ван гог', 'гог'],
+    'monet': ['monet', 'claude monet', 'моне', 'клод моне'],
+    'rembrandt': ['rembrandt', 'рембрандт'],
+    'leonardo da vinci': ['leonardo', 'da vinci', 'leonardo da vinci', 'леонардо', 'да винчи', 'леонардо да винчи'],
+    'picasso': ['picasso', 'pablo picasso', 'пикассо', 'пабло пикассо'],
+    'degas': ['degas', 'edgar degas', 'дега', 'эдгар дега'],
+    'michelangelo': ['michelangelo', 'микеланджело'],
+    'caravaggio': ['caravaggio', 'караваджо'],
+    'raphael': ['raphael', 'raffael', 'рафаэль'],
+    'rubens': ['rubens', 'рубенс'],
+    'vermeer': ['vermeer', 'вермеер'],
+    'turner': ['turner', 'тёрнер', 'тернер'],
+    'cezanne': ['cezanne', 'cézanne', 'сезанн'],
+    'matisse': ['matisse', 'матисс'],
+    'goya': ['goya', 'гойя'],
+    'renoir': ['renoir', 'ренуар'],
+    'manet': ['manet', 'мане'],
+    'klimt': ['klimt', 'климт'],
+    'gauguin': ['gauguin', 'гоген'],
+    'botticelli': ['botticelli', 'боттичелли'],
+    'titian': ['titian', 'tizian', 'тициан'],
+    'durer': ['durer', 'dürer', 'duerer', 'дюрер'],
+    'el greco': ['el greco', 'эль греко'],
+    'velazquez': ['velazquez', 'velázquez', 'веласкес'],
+    'hokusai': ['hokusai', 'хокусай'],
+}
+
+MOVEMENTS = {
+    'renaissance': ['renaissance', 'ренессанс', 'возрождение'],
+    'baroque': ['baroque', 'barock', 'барокко'],
+    'rococo': ['rococo', 'rokoko', 'рококо'],
+    'romanticism': ['romanticism', 'romantic', 'romantik', 'романтизм'],
+    'impressionism': ['impressionism', 'impressionist', 'impressionismus', 'impressionistisch',
+                      'импрессионизм', 'импрессионист', 'импрессионистский'],
+    'post-impressionism': ['post-impressionism', 'postimpressionism', 'post impressionism',
+                           'постимпрессионизм', 'postimpressionismus'],
+    'cubism': ['cubism', 'kubismus', 'кубизм'],
+    'surrealism': ['surrealism', 'surrealismus', 'сюрреализм'],
+    'expressionism': ['expressionism', 'expressionismus', 'экспрессионизм'],
+    'realism': ['realism', 'realismus', 'реализм'],
+    'medieval': ['medieval', 'middle ages', 'mittelalter', 'средневековье', 'средневековый'],
+    'gothic': ['gothic', 'gotik', 'готика', 'готический'],
+    'modern': ['modern', 'moderne', 'модерн'],
+}
+
+SUBJECTS = {
+    'portrait': ['portrait', 'porträt', 'bildnis', 'портрет'],
+    'self-portrait': ['self-portrait', 'self portrait', 'selbstporträt', 'selbstbildnis', 'автопортрет'],
+    'landscape': ['landscape', 'landschaft', 'пейзаж'],
+    'still life': ['still life', 'stillleben', 'натюрморт'],
+    'flowers': ['flower', 'flowers', 'blume', 'blumen', 'цветок', 'цветы'],
+    'sunflowers': ['sunflower', 'sunflowers', 'sonnenblume', 'sonnenblumen', 'подсолнух', 'подсолнухи'],
+    'water lilies': ['water lily', 'water lilies', 'seerose', 'seerosen', 'кувшинка', 'кувшинки'],
+    'sea': ['sea', 'ocean', 'meer', 'море', 'океан'],
+    'seascape': ['seascape', 'marine', 'seestück', 'марина'],
+    'river': ['river', 'fluss', 'река'],
+    'water': ['water', 'wasser', 'вода'],
+    'garden': ['garden', 'garten', 'сад'],
+    'city': ['city', 'town', 'stadt', 'город'],
+    'horse': ['horse', 'horses', 'pferd', 'pferde', 'лошадь', 'конь'],
+    'dancers': ['dancer', 'dancers', 'ballet', 'tänzerin', 'ballett', 'балерина', 'балет', 'танцовщица'],
+    'woman': ['woman', 'women', 'frau', 'frauen', 'женщина'],
+    'man': ['man', 'men', 'mann', 'мужчина'],
+    'child': ['child', 'children', 'kinder', 'ребёнок', 'ребенок', 'дети'],
+    'madonna': ['madonna', 'virgin', 'мадонна', 'богоматерь'],
+    'religious': ['religious', 'religiös', 'религиозный'],
+    'mythology': ['mythology', 'mythologie', 'мифология'],
+    'night': ['night', 'nacht', 'ночь'],
+    'winter': ['winter', 'зима'],
+    'mountains': ['mountain', 'mountains', 'berg', 'berge', 'гора', 'горы'],
+    'forest': ['forest', 'woods', 'wald', 'лес'],
+    'ship': ['ship', 'boat', 'schiff', 'корабль', 'лодка'],
+    'cat': ['cat', 'katze', 'кошка', 'кот'],
+    'dog': ['dog', 'hund', 'собака'],
+    'sculpture': ['sculpture', 'skulptur', 'статуя', 'скульптура'],
+    'armor': ['armor', 'armour', 'rüstung', 'доспехи'],
+}
+
+COLOURS = {
+    'red': ['red', 'красный'],
+    'blue': ['blue', 'blau', 'синий', 'голубой'],
+    'green': ['green', 'grün', 'зелёный', 'зеленый'],
+    'yellow': ['yellow', 'gelb', 'жёлтый', 'желтый'],
+    'black': ['black', 'schwarz', 'чёрный', 'черный'],
+    'white': ['white', 'weiß', 'weiss', 'белый'],
+    'gold': ['gold', 'golden', 'золотой'],
+}
+
+# Words that carry no search meaning ("show me a painting of ...")
+STOP_WORDS = {
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 'by', 'from',
+    'show', 'me', 'find', 'search', 'some', 'any', 'please', 'i', 'want', 'like', 'see', 'his', 'her',
+    'painting', 'paintings', 'picture', 'pictures', 'artwork', 'artworks', 'art', 'work', 'works',
+    'я', 'хочу', 'покажи', 'покажите', 'найди', 'найдите', 'что-то', 'что', 'то', 'мне', 'с', 'со', 'про',
+    'и', 'в', 'на', 'по', 'из', 'картина', 'картину', 'картины', 'картин', 'работы', 'работа',
+    'ich', 'möchte', 'zeig', 'zeige', 'mir', 'etwas', 'ein', 'eine', 'einen', 'der', 'die', 'das',
+    'den', 'dem', 'des', 'und', 'mit', 'von', 'im', 'bild', 'bilder', 'gemälde', 'werk', 'werke',
+}
+
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh',
+    'щ': 'shch', 'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+}
+
+# Longest suffixes first
+RUSSIAN_SUFFIXES = sorted([
+    'ами', 'ями', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ый', 'ий', 'ой', 'ая', 'яя',
+    'ое', 'ее', 'ые', 'ие', 'ей', 'ом', 'ем', 'ах', 'ях', 'ов', 'ев',
+    'а', 'я', 'ы', 'и', 'у', 'ю', 'е', 'о', 'ь', 'й',
+], key=len, reverse=True)
+# No 'er': it turns names and agent nouns into other words (Berger -> berg)
+LATIN_SUFFIXES = sorted(['ings', 'ing', 'ies', 'es', 'en', 's', 'e', 'n'], key=len, reverse=True)
+
+MAX_PHRASE_WORDS = 3
+
+
+def stem(word):
+    """Very small suffix-stripping stemmer for EN/DE/RU words.
+
+    Strips until nothing more comes off, so stem(stem(w)) == stem(w) and an
+    inflected query word lands on the same key as its alias in the index
+    (gardens -> garden -> gard, like garden -> gard).
+    """
+    suffixes = RUSSIAN_SUFFIXES if re.search(r'[а-яё]', word) else LATIN_SUFFIXES
+    while True:
+        for suffix in suffixes:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+        else:
+            return word
+
+
+def transliterate(word):
+    """Cyrillic -> Latin (Рембрандт -> rembrandt)"""
+    return ''.join(CYRILLIC_TO_LATIN.get(ch, ch) for ch in word)
+
+
+def tokenize(text):
+    text = re.sub(r"'s\b", '', text.lower().replace('ё', 'е'))
+    return re.findall(r"[\w'-]+", text)
+
+
+def _phrase_key(phrase):
+    return tuple(stem(word) for word in tokenize(phrase))
+
+
+def _build_index():
+    """(stemmed words) -> canonical keyword, for every alias in the lexicon"""
+    index = {}
+    for table in (ARTISTS, MOVEMENTS, SUBJECTS, COLOURS):
+        for keyword, aliases in table.items():
+            for alias in aliases + [keyword]:
+                index[_phrase_key(alias)] = keyword
+    return index
+
+
+PHRASE_INDEX = _build_index()
+# Latin artist aliases, for transliterated Cyrillic names not listed above
+ARTIST_TRANSLIT_INDEX = {
+    stem(alias.replace(' ', '')): keyword
+    for keyword, aliases in ARTISTS.items()
+    for alias in aliases + [keyword]
+    if not re.search(r'[а-яё]', alias)
+}
+
+
+def match_keywords(text):
+    """Look the query up in the lexicon.
+
+    Returns (keywords, coverage): the canonical English keywords found and the
+    share of meaningful (non stop-word) words they account for.
+    """
+    words = [w for w in tokenize(text) if w not in STOP_WORDS]
+    if not words:
+        return [], 0.0
+
+    stems = [stem(w) for w in words]
+    keywords = []
+    matched = 0
+    i = 0
+    while i < len(words):
+        for size in range(min(MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+            keyword = PHRASE_INDEX.get(tuple(stems[i:i + size]))
+            if keyword is None and size == 1 and re.search(r'[а-яё]', words[i]):
+                keyword = ARTIST_TRANSLIT_INDEX.get(stem(transliterate(words[i])))
+            if keyword is not None:
+                if keyword not in keywords:
+                    keywords.append(keyword)
+                matched += size
+                i += size
+                break
+        else:
+            i += 1
+
+    return keywords, matched / len(words)
@@ -0,0 +1,201 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class ArtworkCache:
+    """Two-tier cache for normalized artwork records, keyed by Met objectID.
+
+    Tier 1 is an in-process LRU (OrderedDict). Tier 2 is a SQLite file, so
+    cached artworks survive restarts. Both tiers expire entries after `ttl`
+    seconds and are bounded in size (least recently used entries go first).
+    Objects without an image are cached too (as None), so they are not
+    fetched again either.
+
+    Hits in either tier refresh the disk row's last_access, which disk
+    eviction goes by. Those updates are collected and written together
+    (every `touch_batch` hits or `touch_interval` seconds), not one commit
+    per hit.
+    """
+
+    def __init__(self, db_path="artwork_cache.db", memory_size=2000,
+                 disk_size=100000, ttl=7 * 24 * 3600, touch_batch=500, touch_interval=60.0):
+        self.db_path = db_path
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.ttl = ttl
+        self.touch_batch = touch_batch
+        self.touch_interval = touch_interval
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        # object_id -> last access not yet written to the disk tier
+        self._touched = {}
+        self._touched_since = time.time()
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS artworks (
+                object_id INTEGER PRIMARY KEY,
+                data TEXT,
+                fetched_at REAL,
+                last_access REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_artworks_last_access ON artworks(last_access)")
+        # Telegram file_id of an artwork image that was already sent once
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS telegram_files (
+                object_id INTEGER PRIMARY KEY,
+                file_id TEXT,
+                stored_at REAL
+            )
+        """)
+        self._conn.commit()
+        # object_id -> file_id or None (not sent yet), LRU of memory_size like _memory
+        self._file_ids = OrderedDict()
+
+    def get(self, object_id, max_age=None):
+        """Return (found, artwork). artwork is None for objects without an image.
+
+        max_age overrides the ttl for this lookup (e.g. to serve expired
+        entries while the Met is down).
+        """
+        object_id = int(object_id)
+        now = time.time()
+        max_age = self.ttl if max_age is None else max_age
+
+        with self._lock:
+            entry = self._memory.get(object_id)
+            if entry is not None:
+                fetched_at, artwork = entry
+                if now - fetched_at < max_age:
+                    self._memory.move_to_end(object_id)
+                    self._touch(object_id, now)
+                    self.stats['memory_hits'] += 1
+                    return True, artwork
+                if max_age <= self.ttl:
+                    del self._memory[object_id]
+
+            row = self._conn.execute(
+                "SELECT data, fetched_at FROM artworks WHERE object_id = ?", (object_id,)
+            ).fetchone()
+
+            if row and now - row[1] < max_age:
+                artwork = json.loads(row[0]) if row[0] else None
+                self._touch(object_id, now)
+                self._remember(object_id, row[1], artwork)
+                self.stats['disk_hits'] += 1
+                return True, artwork
+
+            self.stats['misses'] += 1
+            return False, None
+
+    def put(self, object_id, artwork):
+        """Store an artwork record (or None if the object has no image)"""
+        object_id = int(object_id)
+        now = time.time()
+        data = json.dumps(artwork, ensure_ascii=False) if artwork else None
+
+        with self._lock:
+            self._remember(object_id, now, artwork)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO artworks (object_id, data, fetched_at, last_access) VALUES (?, ?, ?, ?)",
+                (object_id, data, now, now)
+            )
+            self._conn.commit()
+
+            self._writes_since_evict += 1
+            if self._writes_since_evict >= 100:
+                self._evict_disk(now)
+                self._writes_since_evict = 0
+
+    def _touch(self, object_id, now):
+        """Note an access; write the collected ones when enough have piled up"""
+        self._touched[object_id] = now
+        if len(self._touched) >= self.touch_batch or now - self._touched_since >= self.touch_interval:
+            self._write_touched(now)
+
+    def _write_touched(self, now):
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE artworks SET last_access = ? WHERE object_id = ?",
+                [(accessed, object_id) for object_id, accessed in self._touched.items()]
+            )
+            self._conn.commit()
+            self._touched.clear()
+        self._touched_since = now
+
+    def _remember(self, object_id, fetched_at, artwork):
+        """Put an entry into the in-memory LRU"""
+        self._memory[object_id] = (fetched_at, artwork)
+        self._memory.move_to_end(object_id)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _remember_file_id(self, object_id, file_id):
+        self._file_ids[object_id] = file_id
+        self._file_ids.move_to_end(object_id)
+        while len(self._file_ids) > self.memory_size:
+            self._file_ids.popitem(last=False)
+
+    def _evict_disk(self, now):
+        """Drop expired rows and trim the disk tier to disk_size"""
+        self._write_touched(now)
+        self._conn.execute("DELETE FROM artworks WHERE fetched_at < ?", (now - self.ttl,))
+        self._conn.execute("""
+            DELETE FROM artworks WHERE object_id IN (
+                SELECT object_id FROM artworks ORDER BY last_access DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.disk_size,))
+        self._conn.commit()
+
+    def get_file_id(self, object_id):
+        """Telegram file_id for the artwork image, or None if it was never sent"""
+        if object_id is None:
+            return None
+        object_id = int(object_id)
+
+        with self._lock:
+            if object_id in self._file_ids:
+                self._file_ids.move_to_end(object_id)
+                return self._file_ids[object_id]
+            row = self._conn.execute(
+                "SELECT file_id FROM telegram_files WHERE object_id = ?", (object_id,)
+            ).fetchone()
+            self._remember_file_id(object_id, row[0] if row else None)
+            return row[0] if row else None
+
+    def put_file_id(self, object_id, file_id):
+        """Remember the file_id of a delivered image (None forgets it)"""
+        if object_id is None:
+            return
+        object_id = int(object_id)
+
+        with self._lock:
+            self._remember_file_id(object_id, file_id)
+            if file_id:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO telegram_files (object_id, file_id, stored_at) VALUES (?, ?, ?)",
+                    (object_id, file_id, time.time())
+                )
+            else:
+                self._conn.execute("DELETE FROM telegram_files WHERE object_id = ?", (object_id,))
+            self._conn.commit()
+
+    def hit_rate(self):
+        """Share of lookups served from either tier"""
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def close(self):
+        with self._lock:
+            self._write_touched(time.time())
+            self._conn.close()
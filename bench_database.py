@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import datetime
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from database import ArtBotDatabase, normalize_query
+
+# Seeds a throwaway database with the original (pre-migration) ultra_art_bot.db
+# schema with millions of rows, applies the migrations and checks that the stats queries the bot shows stay
+# within latency bounds:
+#
+#   python bench_database.py                  # 2M searches, 500k quiz answers
+#   python bench_database.py --searches 5000000 --keep bench.db
+
+# The tables the stats queries use, as ultra_art_bot.db had them before the
+# first migration (the live file may already be migrated)
+BASELINE_SCHEMA = """
+CREATE TABLE users (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT,
+    total_searches INTEGER DEFAULT 0,
+    advanced_searches INTEGER DEFAULT 0,
+    complex_queries INTEGER DEFAULT 0,
+    quiz_score INTEGER DEFAULT 0,
+    quiz_total INTEGER DEFAULT 0,
+    favorite_artist TEXT,
+    favorite_period TEXT,
+    favorite_movement TEXT,
+    join_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    expertise_level TEXT DEFAULT 'beginner',
+    total_time_spent INTEGER DEFAULT 0
+);
+CREATE TABLE search_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    query TEXT,
+    keywords TEXT,
+    ai_interpretation TEXT,
+    complexity_score INTEGER,
+    semantic_tags TEXT,
+    results_count INTEGER,
+    search_type TEXT,
+    filters_used TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
+CREATE TABLE quiz_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER,
+    difficulty TEXT,
+    question_type TEXT,
+    question_category TEXT,
+    correct BOOLEAN,
+    artwork_id INTEGER,
+    artwork_title TEXT,
+    artist TEXT,
+    period TEXT,
+    time_taken INTEGER,
+    attempts INTEGER DEFAULT 1,
+    hints_used INTEGER DEFAULT 0,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users(user_id)
+);
+CREATE TABLE favorites (
+    user_id INTEGER,
+    artwork_id INTEGER,
+    title TEXT,
+    artist TEXT,
+    period TEXT,
+    movement TEXT,
+    tags TEXT,
+    personal_notes TEXT,
+    rating INTEGER,
+    date_added TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_viewed TIMESTAMP,
+    view_count INTEGER DEFAULT 0,
+    PRIMARY KEY (user_id, artwork_id)
+);
+CREATE TABLE artwork_analytics (
+    artwork_id INTEGER PRIMARY KEY,
+    view_count INTEGER DEFAULT 0,
+    quiz_appearances INTEGER DEFAULT 0,
+    favorite_count INTEGER DEFAULT 0,
+    average_quiz_difficulty REAL,
+    last_accessed TIMESTAMP
+);
+"""
+
+# query name -> max milliseconds per call (median of the runs)
+LATENCY_BOUNDS_MS = {
+    'user_history': 5,
+    'top_queries_today': 100,
+    'query_count': 20,
+    'artwork_stats': 5,
+}
+
+QUERY_WORDS = [
+    'monet', 'water', 'lilies', 'van', 'gogh', 'sunflowers', 'rembrandt', 'portrait', 'egyptian',
+    'cat', 'armor', 'samurai', 'vase', 'greek', 'landscape', 'impressionism', 'baroque', 'renaissance',
+    'still', 'life', 'degas', 'dancers', 'vermeer', 'rodin', 'sculpture', 'tapestry', 'medieval',
+]
+
+
+def create_baseline(target_path):
+    """Create the pre-migration tables (without rows) in target_path"""
+    conn = sqlite3.connect(target_path)
+    conn.executescript(BASELINE_SCHEMA)
+    return conn
+
+
+def seed(conn, searches, quiz_answers, users, artworks, days):
+    """Fill the pre-migration tables the way the bot would, over the last `days`"""
+    rng = random.Random(42)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    queries = [' '.join(rng.sample(QUERY_WORDS, rng.randint(1, 3))) for _ in range(5000)]
+
+    def timestamp():
+        moment = now - datetime.timedelta(seconds=rng.randint(0, days * 86400))
+        return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+    def search_rows():
+        for _ in range(searches):
+            # Popular queries are searched far more often (Zipf-like)
+            query = queries[min(int(rng.paretovariate(1.2)) - 1, len(queries) - 1)]
+            yield (rng.randint(1, users), query.title(), '[]', rng.randint(0, 5), 'normal', timestamp())
+
+    def quiz_rows():
+        for _ in range(quiz_answers):
+            yield (rng.randint(1, users), 'easy', rng.random() < 0.6, rng.randint(1, artworks), timestamp())
+
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (user_id, username) VALUES (?, ?)",
+            ((user_id, f"user{user_id}") for user_id in range(1, users + 1))
+        )
+        conn.executemany(
+            "INSERT INTO search_history (user_id, query, keywords, results_count, search_type, timestamp) "
+            "VALUES (?, ?, ?, ?, ?, ?)", search_rows()
+        )
+        conn.executemany(
+            "INSERT INTO quiz_results (user_id, difficulty, correct, artwork_id, timestamp) VALUES (?, ?, ?, ?, ?)",
+            quiz_rows()
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO favorites (user_id, artwork_id) VALUES (?, ?)",
+            ((rng.randint(1, users), rng.randint(1, artworks)) for _ in range(searches // 20))
+        )
+        conn.executemany(
+            "INSERT INTO artwork_analytics (artwork_id, view_count) VALUES (?, ?)",
+            ((artwork_id, rng.randint(0, 500)) for artwork_id in range(1, artworks + 1))
+        )
+    return queries
+
+
+async def measure(name, call, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[-1]
+
+
+def explain(conn, sql, params):
+    return ' / '.join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+async def run(args, path):
+    rng = random.Random(7)
+    today = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d 00:00:00')
+
+    conn = create_baseline(path)
+    print(f"🌱 Seeding {args.searches:,} searches and {args.quiz:,} quiz answers...")
+    started = time.perf_counter()
+    queries = seed(conn, args.searches, args.quiz, args.users, args.artworks, args.days)
+    conn.close()
+    print(f"   done in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    db = ArtBotDatabase(path)
+    db.open()
+    print(f"🔧 Migrations applied in {time.perf_counter() - started:.1f}s")
+
+    plans = {
+        'user_history': ("SELECT query, results_count, timestamp FROM search_history "
+                         "WHERE user_id = ? ORDER BY timestamp DESC LIMIT 10", (1,)),
+        'top_queries_today': ("SELECT normalized_query, COUNT(*) FROM search_history WHERE timestamp >= ? "
+                              "GROUP BY normalized_query", (today,)),
+        'query_count': ("SELECT COUNT(*) FROM search_history WHERE normalized_query = ?",
+                        (normalize_query(queries[0]),)),
+        'artwork_stats': ("SELECT COUNT(*) FROM quiz_results WHERE artwork_id = ? AND correct", (1,)),
+    }
+    for name, (sql, params) in plans.items():
+        print(f"🗺️  {name}: {explain(db._read_conn, sql, params)}")
+
+    calls = {
+        'user_history': lambda: db.user_history(rng.randint(1, args.users)),
+        'top_queries_today': lambda: db.top_queries(today),
+        'query_count': lambda: db.query_count(rng.choice(queries[:50])),
+        'artwork_stats': lambda: db.artwork_stats(rng.randint(1, args.artworks)),
+    }
+
+    failures = []
+    for name, call in calls.items():
+        median, worst = await measure(name, call, args.runs)
+        bound = LATENCY_BOUNDS_MS[name]
+        status = '✅' if median <= bound else '❌'
+        print(f"{status} {name}: median {median:.2f} ms, max {worst:.2f} ms (bound {bound} ms)")
+        if median > bound:
+            failures.append(name)
+
+    await db.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the ultra_art_bot.db stats queries")
+    parser.add_argument('--searches', type=int, default=2_000_000)
+    parser.add_argument('--quiz', type=int, default=500_000)
+    parser.add_argument('--users', type=int, default=50_000)
+    parser.add_argument('--artworks', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--keep', help="write the seeded database here instead of a temp file")
+    args = parser.parse_args()
+
+    if args.keep:
+        if os.path.exists(args.keep):
+            os.remove(args.keep)
+        path = args.keep
+        failures = asyncio.run(run(args, path))
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            failures = asyncio.run(run(args, os.path.join(directory, 'bench.db')))
+
+    if failures:
+        raise SystemExit(f"Latency bounds exceeded: {', '.join(failures)}")
+    print("🎉 All stats queries within bounds")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import random
+import time
+
+import dates
+from test_dates import GOLDEN
+
+# Parse/classify throughput of dates.py on a mix of Met date strings:
+#
+#   python bench_dates.py               # 200k dates, half of them repeated
+#   python bench_dates.py --distinct 1  # every date string different (no cache hits)
+
+PREFIXES = ['', 'ca. ', 'probably ', 'dated ']
+
+
+def corpus(count, distinct, rng):
+    """count date strings, `distinct` of them unique"""
+    unique = []
+    for _ in range(max(1, int(count * distinct))):
+        year = rng.randint(1000, 2000)
+        form = rng.randrange(4)
+        if form == 0:
+            text = f"{rng.choice(PREFIXES)}{year}"
+        elif form == 1:
+            text = f"{rng.choice(PREFIXES)}{year}–{(year + rng.randint(1, 9)) % 100:02d}"
+        elif form == 2:
+            text = f"{rng.choice(['early ', 'mid-', 'late ', ''])}{year // 100 + 1}th century"
+        else:
+            text = f"ca. {rng.randint(100, 3000)}–{rng.randint(1, 99)} B.C."
+        unique.append(text + ' ' * rng.randint(0, 3))  # keep strings distinct for the cache
+    unique += [text for text, _, _ in GOLDEN]
+    return [rng.choice(unique) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dates.py")
+    parser.add_argument('--count', type=int, default=200_000)
+    parser.add_argument('--distinct', type=float, default=0.5, help="share of unique date strings")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    texts = corpus(args.count, args.distinct, rng)
+
+    dates.parse_date.cache_clear()
+    started = time.perf_counter()
+    periods = [dates.determine_period(text) for text in texts]
+    elapsed = time.perf_counter() - started
+
+    years = [rng.randint(-3000, 2025) for _ in range(args.count)]
+    started = time.perf_counter()
+    for year in years:
+        dates.period_for_year(year)
+    lookup = time.perf_counter() - started
+
+    unknown = periods.count('')
+    print(f"📅 {args.count:,} dates: {elapsed / args.count * 1e6:.2f} µs per date "
+          f"({dates.parse_date.cache_info().hits:,} cache hits, {unknown} without a period)")
+    print(f"🗂️  period_for_year: {lookup / args.count * 1e9:.0f} ns per lookup")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import random
+import time
+
+import httpx
+
+from met_api import AsyncMetMuseumAPI
+from resilience import HedgingPolicy
+
+# Tail latency of 5-object detail fan-outs against a mock Met, with and
+# without hedged /objects lookups:
+#
+#   python bench_hedging.py                    # 3% of responses take 1 s
+#   python bench_hedging.py --slow-share 0     # no stragglers: hedging should add ~nothing
+#   python bench_hedging.py --concurrency 10   # saturated client: hedges are skipped
+
+
+def mock_transport(rng, slow_share, slow_delay):
+    async def handler(request):
+        if rng.random() < slow_share:
+            await asyncio.sleep(slow_delay)
+        else:
+            await asyncio.sleep(rng.uniform(0.02, 0.06))
+        object_id = int(request.url.path.rsplit('/', 1)[1])
+        return httpx.Response(200, json={'objectID': object_id, 'title': f"Object {object_id}",
+                                         'primaryImage': f"https://example.org/{object_id}.jpg"})
+    return httpx.MockTransport(handler)
+
+
+async def run(hedging, args):
+    rng = random.Random(7)
+    api = AsyncMetMuseumAPI(rate_limit=None, hedging=hedging, max_concurrency=args.concurrency)
+    api._client = httpx.AsyncClient(base_url=api.base_url,
+                                    transport=mock_transport(rng, args.slow_share, args.slow_delay))
+    sent = 0
+    original_get = api._client.get
+
+    async def counting_get(*a, **kw):
+        nonlocal sent
+        sent += 1
+        return await original_get(*a, **kw)
+    api._client.get = counting_get
+
+    latencies = []
+
+    async def user(first_id):
+        # One user after another search: fan-outs of 5 detail lookups
+        for start in range(first_id, first_id + args.fanouts // args.users * 5, 5):
+            started = time.perf_counter()
+            await api.get_artworks(list(range(start, start + 5)), max_results=5)
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(user(i * args.fanouts * 5) for i in range(args.users)))
+    await api.close()
+
+    latencies.sort()
+    p50, p95, p99 = (latencies[min(len(latencies) - 1, len(latencies) * p // 100)] * 1000 for p in (50, 95, 99))
+    return p50, p95, p99, sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hedged /objects lookups against a mock Met")
+    parser.add_argument('--fanouts', type=int, default=2000)
+    parser.add_argument('--slow-share', type=float, default=0.03)
+    parser.add_argument('--slow-delay', type=float, default=1.0)
+    parser.add_argument('--users', type=int, default=10, help="fan-outs running at the same time")
+    parser.add_argument('--concurrency', type=int, default=100, help="max_concurrency of the client")
+    args = parser.parse_args()
+
+    plain = asyncio.run(run(None, args))
+    policy = HedgingPolicy()
+    hedged = asyncio.run(run(policy, args))
+    for name, (p50, p95, p99, sent) in (('plain', plain), ('hedged', hedged)):
+        print(f"{name:>7}: p50 {p50:.0f} ms, p95 {p95:.0f} ms, p99 {p99:.0f} ms, {sent} requests")
+    print(f"📈 {hedged[3] / plain[3] - 1:+.1%} requests; {policy.summary()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,20 @@ from typing import Dict
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
-from met_api import MetMuseumAPI
+from met_api import AsyncMetMuseumAPI
+from artwork_cache import ArtworkCache
+from met_mirror import MetMirror
+from random_pool import RandomArtworkPool
+from delivery import send_artwork_album
+from image_proxy import ImageProxy
+from dates import artwork_period
 
 load_dotenv()
 
 # Initialize API
-met = MetMuseumAPI()
+met = AsyncMetMuseumAPI(cache=ArtworkCache(), mirror=MetMirror())
+random_pool = RandomArtworkPool(met)
+image_proxy = ImageProxy()
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start command"""
@@ -79,7 +87,7 @@ async def random_artwork(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send random artwork with detailed information"""
     await update.message.reply_text("🎲 Finding an amazing artwork for you...")
     
-    artwork = met.get_random_artwork()
+    artwork = await random_pool.get()
     
     if artwork and artwork['image_url']:
         # Generate detailed description
@@ -93,14 +101,8 @@ async def random_artwork(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 {description}"""
         
-        try:
-            await update.message.reply_photo(
-                photo=artwork['image_url'],
-                caption=caption[:1024],
-                parse_mode='Markdown'
-            )
-        except Exception as e:
-            print(f"Error sending photo: {e}")
+        sent = await send_artwork_album(update.message, [(artwork, caption)], file_cache=met.cache, image_proxy=image_proxy)
+        if not sent:
             await update.message.reply_text("❌ Sorry, couldn't display this artwork. Try again!")
     else:
         await update.message.reply_text("❌ Sorry, couldn't find an artwork. Try again!")
@@ -112,7 +114,7 @@ async def search_artwork(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text(f"🔍 Searching for: '{query}'...")
     
     # Search artworks
-    artworks = met.search_artworks(query, max_results=3)
+    artworks = await met.search_artworks(query, max_results=3)
     
     if not artworks:
         await update.message.reply_text(
@@ -130,28 +132,21 @@ async def search_artwork(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Send results
     await update.message.reply_text(f"✅ Found {len(artworks)} artwork(s):")
     
+    items = []
     for artwork in artworks:
-        if artwork['image_url']:
-            # Generate detailed description
-            description = generate_detailed_description(artwork)
-            
-            caption = f"""🎨 **{artwork['title']}**
+        # Generate detailed description
+        description = generate_detailed_description(artwork)
+        
+        caption = f"""🎨 **{artwork['title']}**
 
 👨‍🎨 **Artist:** {artwork['artist']}
 📅 **Year:** {artwork.get('date', 'Unknown')}
 🏛️ **Museum:** Metropolitan Museum of Art
 
 {description}"""
-            
-            try:
-                await update.message.reply_photo(
-                    photo=artwork['image_url'],
-                    caption=caption[:1024],
-                    parse_mode='Markdown'
-                )
-            except Exception as e:
-                print(f"Error sending artwork: {e}")
-                continue
+        items.append((artwork, caption))
+    
+    await send_artwork_album(update.message, items, file_cache=met.cache, image_proxy=image_proxy)
 
 def generate_detailed_description(artwork: Dict) -> str:
     """Generate comprehensive artwork description with historical context"""
@@ -183,7 +178,7 @@ def generate_detailed_description(artwork: Dict) -> str:
     description += f"{artist_context}\n\n"
     
     # Period Information
-    period = determine_period(date)
+    period = artwork_period(artwork)
     if period:
         description += f"⏰ **Artistic Period:**\n"
         period_info = get_period_information(period)
@@ -205,32 +200,6 @@ def generate_detailed_description(artwork: Dict) -> str:
     
     return description
 
-def determine_period(date_str: str) -> str:
-    """Determine artistic period from date"""
-    try:
-        year = int(''.join(filter(str.isdigit, date_str))[:4])
-        
-        if year < 1400:
-            return 'Medieval'
-        elif year < 1600:
-            return 'Renaissance'
-        elif year < 1700:
-            return 'Baroque'
-        elif year < 1800:
-            return '18th Century'
-        elif year < 1850:
-            return 'Romanticism'
-        elif year < 1890:
-            return 'Impressionism'
-        elif year < 1910:
-            return 'Post-Impressionism'
-        elif year < 1950:
-            return 'Modern Art'
-        else:
-            return 'Contemporary'
-    except:
-        return ''
-
 def get_artist_context(artist: str) -> str:
     """Get biographical context about the artist"""
     artist_lower = artist.lower()
@@ -317,6 +286,18 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             "❌ An error occurred. Please try again or use /help for assistance."
         )
 
+async def start_background_jobs(application: Application):
+    """Warm up the random artwork pool"""
+    random_pool.start()
+
+async def close_clients(application: Application):
+    """Close shared HTTP clients on shutdown"""
+    await random_pool.close()
+    await met.close()
+    await image_proxy.close()
+    met.cache.close()
+    met.mirror.close()
+
 def main():
     """Start the bot"""
     # Get token
@@ -327,7 +308,7 @@ def main():
         return
     
     # Create application
-    app = Application.builder().token(token).build()
+    app = Application.builder().token(token).post_init(start_background_jobs).post_shutdown(close_clients).build()
     
     # Add handlers
     app.add_handler(CommandHandler("start", start))
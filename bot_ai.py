@@ -1,16 +1,40 @@
+import asyncio
 import os
 from typing import Dict, List
 from dotenv import load_dotenv
 from telegram import Update, ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
-from met_api import MetMuseumAPI
+from met_api import AsyncMetMuseumAPI
+from artwork_cache import ArtworkCache
+from met_mirror import MetMirror
+from random_pool import RandomArtworkPool
 from ai_helper import AIArtAssistant
+from delivery import send_artwork_album
+from descriptions import DescriptionRenderer
+from image_proxy import ImageProxy
+from shared_state import create_state_backend
+from database import ArtBotDatabase
+from persistence import UsersTablePersistence
+from semantic_index import SemanticIndex
+from similar_index import SimilarArtworks
+from pagination import ResultPager
 
 load_dotenv()
 
 # Initialize APIs
-met = MetMuseumAPI()
+state = create_state_backend(os.getenv('STATE_BACKEND', 'sqlite:///shared_state.db'))
+# MET_RATE_LIMIT: requests per second to the Met (cluster.py gives each worker its share)
+met = AsyncMetMuseumAPI(cache=ArtworkCache(), mirror=MetMirror(), shared_cache=state, hedging=True,
+                        rate_limit=float(os.getenv('MET_RATE_LIMIT', '40')))
+random_pool = RandomArtworkPool(met)
+image_proxy = ImageProxy()
 ai_assistant = AIArtAssistant()
+db = ArtBotDatabase()
+# None until `python semantic_index.py build` was run; SEMANTIC_MIN_SCORE overrides the calibrated cutoff
+semantic_min_score = os.getenv('SEMANTIC_MIN_SCORE')
+semantic_index = SemanticIndex.load(min_score=float(semantic_min_score) if semantic_min_score else None)
+similar = SimilarArtworks()  # empty until `python similar_index.py build` was run
+pager = ResultPager(met, image_proxy)
 
 # ==================== MULTILINGUAL TEXTS ====================
 TEXTS = {
@@ -98,7 +122,12 @@ Use /start to return to main menu!""",
         'style': 'Style',
         'error_display': '❌ Sorry, couldn\'t display this artwork. Please try again!',
         'error_find': '❌ Sorry, couldn\'t find an artwork. Please try again!',
-        'error_general': '❌ An error occurred. Please try again or use /help for assistance.'
+        'error_general': '❌ An error occurred. Please try again or use /help for assistance.',
+        'similar_prompt': '🔁 Want more like this? Pick an artwork:',
+        'similar_found': '🔁 Similar works:',
+        'more_results': '➡️ More results:',
+        'next_page': '➡️ Next page',
+        'page_expired': '⌛ These results have expired. Please search again.'
     },
     'ru': {
         'welcome': """🎨 Добро пожаловать в Бот Художественного Музея!
@@ -184,7 +213,12 @@ Use /start to return to main menu!""",
         'style': 'Стиль',
         'error_display': '❌ Извините, не удалось показать эту картину. Попробуйте снова!',
         'error_find': '❌ Извините, не удалось найти картину. Попробуйте снова!',
-        'error_general': '❌ Произошла ошибка. Попробуйте снова или используйте /help для помощи.'
+        'error_general': '❌ Произошла ошибка. Попробуйте снова или используйте /help для помощи.',
+        'similar_prompt': '🔁 Хотите похожие работы? Выберите произведение:',
+        'similar_found': '🔁 Похожие работы:',
+        'more_results': '➡️ Ещё результаты:',
+        'next_page': '➡️ Следующая страница',
+        'page_expired': '⌛ Эти результаты устарели. Пожалуйста, повторите поиск.'
     },
     'de': {
         'welcome': """🎨 Willkommen beim Kunstmuseum-Bot!
@@ -270,10 +304,17 @@ Verwenden Sie /start, um zum Hauptmenü zurückzukehren!""",
         'style': 'Stil',
         'error_display': '❌ Entschuldigung, konnte dieses Kunstwerk nicht anzeigen. Bitte versuchen Sie es erneut!',
         'error_find': '❌ Entschuldigung, konnte kein Kunstwerk finden. Bitte versuchen Sie es erneut!',
-        'error_general': '❌ Ein Fehler ist aufgetreten. Bitte versuchen Sie es erneut oder verwenden Sie /help für Hilfe.'
+        'error_general': '❌ Ein Fehler ist aufgetreten. Bitte versuchen Sie es erneut oder verwenden Sie /help für Hilfe.',
+        'similar_prompt': '🔁 Mehr davon? Wählen Sie ein Kunstwerk:',
+        'similar_found': '🔁 Ähnliche Werke:',
+        'more_results': '➡️ Weitere Ergebnisse:',
+        'next_page': '➡️ Nächste Seite',
+        'page_expired': '⌛ Diese Ergebnisse sind abgelaufen. Bitte suchen Sie erneut.'
     }
 }
 
+descriptions = DescriptionRenderer(TEXTS)
+
 def get_text(lang: str, key: str, **kwargs) -> str:
     """Get text in user's language with formatting"""
     text = TEXTS.get(lang, TEXTS['en']).get(key, TEXTS['en'].get(key, ''))
@@ -281,6 +322,10 @@ def get_text(lang: str, key: str, **kwargs) -> str:
         text = text.format(**kwargs)
     return text
 
+def get_user_language(context: ContextTypes.DEFAULT_TYPE, default: str = 'en') -> str:
+    """User's language (kept across restarts by UsersTablePersistence)"""
+    return context.user_data.get('language', default)
+
 # ==================== KEYBOARDS ====================
 def get_language_keyboard():
     """Language selection keyboard"""
@@ -345,13 +390,30 @@ def get_artist_selection_keyboard():
     ]
     return InlineKeyboardMarkup(keyboard)
 
+def get_results_keyboard(artworks: List[Dict], lang: str, page_token: str = None):
+    """One "Similar works" button per artwork that has precomputed neighbours, and a "Next page" button"""
+    keyboard = [
+        [InlineKeyboardButton(f"🔁 {artwork['title'][:40]}", callback_data=f"similar_{artwork['object_id']}")]
+        for artwork in artworks if artwork.get('object_id') in similar
+    ]
+    if page_token:
+        keyboard.append([InlineKeyboardButton(get_text(lang, 'next_page'), callback_data=f"page_{page_token}")])
+    return InlineKeyboardMarkup(keyboard) if keyboard else None
+
+async def offer_more(message, artworks: List[Dict], lang: str, page_token: str = None):
+    """Follow the album with "Similar works" / "Next page" buttons (albums cannot carry buttons)"""
+    keyboard = get_results_keyboard(artworks, lang, page_token)
+    if keyboard is not None:
+        prompt = 'similar_prompt' if len(keyboard.inline_keyboard) > bool(page_token) else 'more_results'
+        await message.reply_text(get_text(lang, prompt), reply_markup=keyboard)
+
 # ==================== COMMAND HANDLERS ====================
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start command with language selection"""
     user = update.effective_user
     
     # Check if language is already set
-    if 'language' not in context.user_data:
+    if not get_user_language(context, default=None):
         await update.message.reply_text(
             TEXTS['en']['welcome'],
             reply_markup=get_language_keyboard(),
@@ -386,7 +448,7 @@ async def language_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Help command"""
-    lang = context.user_data.get('language', 'en')
+    lang = get_user_language(context)
     await update.message.reply_text(
         get_text(lang, 'help_text'),
         parse_mode='Markdown'
@@ -394,7 +456,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def search_by_period(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Search by artistic period"""
-    lang = context.user_data.get('language', 'en')
+    lang = get_user_language(context)
     await update.message.reply_text(
         get_text(lang, 'select_period'),
         reply_markup=get_period_selection_keyboard(lang),
@@ -403,7 +465,7 @@ async def search_by_period(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def search_by_artist(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Search by famous artist"""
-    lang = context.user_data.get('language', 'en')
+    lang = get_user_language(context)
     await update.message.reply_text(
         get_text(lang, 'select_artist'),
         reply_markup=get_artist_selection_keyboard(),
@@ -412,10 +474,10 @@ async def search_by_artist(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def random_artwork(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Get random artwork"""
-    lang = context.user_data.get('language', 'en')
+    lang = get_user_language(context)
     await update.message.reply_text(get_text(lang, 'finding_random'))
     
-    artwork = met.get_random_artwork()
+    artwork = await random_pool.get()
     
     if artwork and artwork.get('image_url'):
         description = generate_detailed_description(artwork, lang)
@@ -428,21 +490,17 @@ async def random_artwork(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 {description}"""
         
-        try:
-            await update.message.reply_photo(
-                photo=artwork['image_url'],
-                caption=caption[:1024],
-                parse_mode='Markdown'
-            )
-        except Exception as e:
-            print(f"Error sending photo: {e}")
+        sent = await send_artwork_album(update.message, [(artwork, caption)], file_cache=met.cache, image_proxy=image_proxy)
+        if sent:
+            db.record_views(update.effective_user, [artwork])
+        else:
             await update.message.reply_text(get_text(lang, 'error_display'))
     else:
         await update.message.reply_text(get_text(lang, 'error_find'))
 
 async def advanced_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Advanced search"""
-    lang = context.user_data.get('language', 'en')
+    lang = get_user_language(context)
     user_message = update.message.text
     
     # Handle menu buttons
@@ -474,7 +532,7 @@ async def advanced_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     # Extract keywords using AI
     language_detected = ai_assistant.detect_language(user_message)
-    keywords = ai_assistant.extract_search_keywords(user_message, language_detected)
+    keywords = await ai_assistant.extract_search_keywords_async(user_message, language_detected)
     
     if not keywords:
         await update.message.reply_text(
@@ -483,17 +541,27 @@ async def advanced_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    # Search
-    search_query = " ".join(keywords)
-    artworks = met.search_artworks(search_query, max_results=5)
-    
-    if not artworks and len(keywords) > 2:
-        search_query = " ".join(keywords[:2])
-        artworks = met.search_artworks(search_query, max_results=5)
-    
-    if not artworks and len(keywords) > 0:
-        search_query = keywords[0]
-        artworks = met.search_artworks(search_query, max_results=5)
+    # Search: all keywords, then the first two, then the first one (run in parallel)
+    candidate_queries = [" ".join(keywords)]
+    if len(keywords) > 2:
+        candidate_queries.append(" ".join(keywords[:2]))
+    candidate_queries.append(keywords[0])
+    
+    search_query, artworks = await met.search_first_available(candidate_queries, max_results=5)
+    search_attempts = candidate_queries.index(search_query) + 1 if artworks else len(candidate_queries)
+    # The whole ID list is cached by now, so the "Next page" cursor costs no request
+    result_ids = await met.search_ids(search_query) if artworks else []
+    
+    if not artworks and semantic_index is not None:
+        # Mood/description queries the keyword search cannot answer: nearest artworks by meaning
+        # (the embedding model is English, so other languages go in as the translated keywords)
+        semantic_query = user_message if language_detected == 'en' else " ".join(keywords)
+        matches = await semantic_index.search(semantic_query, k=15)
+        result_ids = [object_id for object_id, _ in matches]
+        artworks = await met.get_artworks(result_ids, max_results=5)
+        search_attempts += 1
+    db.record_search(update.effective_user, user_message, keywords, len(artworks), 'normal',
+                     search_attempts=search_attempts)
     
     if not artworks:
         await update.message.reply_text(
@@ -502,236 +570,38 @@ async def advanced_search(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
+    # Open the cursor first: page 2 is prefetched while this page is sent
+    page_token = pager.open(result_ids, artworks, page_size=5)
+    
     # Send results
     await update.message.reply_text(
         get_text(lang, 'found_artworks', count=len(artworks)),
         parse_mode='Markdown'
     )
     
-    for artwork in artworks:
-        if artwork.get('image_url'):
-            description = generate_detailed_description(artwork, lang)
-            
-            caption = f"""🗽 **{artwork['title']}**
-
-👨‍🎨 **{get_text(lang, 'artist_name')}:** {artwork['artist']}
-📅 **{get_text(lang, 'year')}:** {artwork.get('date', 'Unknown')}
-🏛️ **{get_text(lang, 'museum')}:** Metropolitan Museum of Art
+    await send_artwork_album(
+        update.message,
+        [(artwork, build_caption(artwork, lang)) for artwork in artworks],
+        file_cache=met.cache,
+        image_proxy=image_proxy
+    )
+    db.record_views(update.effective_user, artworks)
+    await offer_more(update.message, artworks, lang, page_token)
 
-{description}"""
-            
-            try:
-                await update.message.reply_photo(
-                    photo=artwork['image_url'],
-                    caption=caption[:1024],
-                    parse_mode='Markdown'
-                )
-            except Exception as e:
-                print(f"Error sending artwork: {e}")
-                continue
+def build_caption(artwork: Dict, lang: str, with_museum: bool = True) -> str:
+    """Photo caption: title, artist, year and the detailed description"""
+    return descriptions.caption(artwork, lang, with_museum)
 
 def generate_detailed_description(artwork: Dict, lang: str) -> str:
     """Generate detailed description in user's language"""
-    title = artwork.get('title', 'Unknown')
-    artist = artwork.get('artist', 'Unknown Artist')
-    date = artwork.get('date', 'Unknown period')
-    culture = artwork.get('culture', '')
-    department = artwork.get('department', '')
-    medium = artwork.get('medium', '')
-    
-    description = ""
-    
-    # Historical Context
-    description += get_text(lang, 'historical_context') + "\n"
-    
-    if culture:
-        if lang == 'ru':
-            description += f"Этот шедевр происходит из культуры {culture}. "
-        elif lang == 'de':
-            description += f"Dieses Meisterwerk stammt aus der {culture} Kultur. "
-        else:
-            description += f"This masterpiece originates from {culture} culture. "
-    
-    if lang == 'ru':
-        description += f"Создано {artist}"
-    elif lang == 'de':
-        description += f"Geschaffen von {artist}"
-    else:
-        description += f"Created by {artist}"
-    
-    if date and date != 'Unknown':
-        if lang == 'ru':
-            description += f" в {date}"
-        elif lang == 'de':
-            description += f" im Jahr {date}"
-        else:
-            description += f" in {date}"
-    
-    description += ".\n\n"
-    
-    # Artist Information
-    description += get_text(lang, 'about_artist') + "\n"
-    artist_context = get_artist_context(artist, lang)
-    description += f"{artist_context}\n\n"
-    
-    # Period Information
-    period = determine_period(date)
-    if period:
-        description += get_text(lang, 'artistic_period') + "\n"
-        period_info = get_period_information(period, lang)
-        description += f"{period_info}\n\n"
-    
-    # Technical Details
-    description += get_text(lang, 'technical_details') + "\n"
-    
-    if medium:
-        description += f"{get_text(lang, 'medium')}: {medium}\n"
-    
-    if department:
-        description += f"{get_text(lang, 'department')}: {department}\n"
-    
-    # Artistic characteristics
-    characteristics = get_artistic_characteristics(artist, period, title.lower(), lang)
-    if characteristics:
-        description += f"{get_text(lang, 'style')}: {characteristics}\n"
-    
-    return description
-
-def determine_period(date_str: str) -> str:
-    """Determine artistic period from date"""
-    try:
-        year = int(''.join(filter(str.isdigit, date_str))[:4])
-        
-        if year < 1400:
-            return 'Medieval'
-        elif year < 1600:
-            return 'Renaissance'
-        elif year < 1700:
-            return 'Baroque'
-        elif year < 1800:
-            return '18th Century'
-        elif year < 1850:
-            return 'Romanticism'
-        elif year < 1890:
-            return 'Impressionism'
-        elif year < 1910:
-            return 'Post-Impressionism'
-        elif year < 1950:
-            return 'Modern Art'
-        else:
-            return 'Contemporary'
-    except:
-        return ''
-
-def get_artist_context(artist: str, lang: str) -> str:
-    """Get artist biography in user's language"""
-    artist_lower = artist.lower()
-    
-    contexts = {
-        'van gogh': {
-            'en': "Vincent van Gogh (1853-1890) was a Dutch Post-Impressionist painter whose work profoundly influenced 20th-century art. Known for bold colors and emotional honesty.",
-            'ru': "Винсент ван Гог (1853-1890) был голландским постимпрессионистом, чьи работы глубоко повлияли на искусство XX века. Известен яркими цветами и эмоциональной честностью.",
-            'de': "Vincent van Gogh (1853-1890) war ein niederländischer postimpressionistischer Maler, dessen Werk die Kunst des 20. Jahrhunderts tiefgreifend beeinflusste. Bekannt für kräftige Farben und emotionale Ehrlichkeit."
-        },
-        'monet': {
-            'en': "Claude Monet (1840-1926) was a founder of French Impressionism. Famous for his series paintings capturing light and atmosphere.",
-            'ru': "Клод Моне (1840-1926) был основателем французского импрессионизма. Знаменит серийными картинами, запечатлевающими свет и атмосферу.",
-            'de': "Claude Monet (1840-1926) war ein Begründer des französischen Impressionismus. Berühmt für seine Serienbilder, die Licht und Atmosphäre einfangen."
-        },
-        'rembrandt': {
-            'en': "Rembrandt van Rijn (1606-1669) was a Dutch Golden Age painter, master of light and shadow (chiaroscuro).",
-            'ru': "Рембрандт ван Рейн (1606-1669) был художником Золотого века Нидерландов, мастером света и тени (кьяроскуро).",
-            'de': "Rembrandt van Rijn (1606-1669) war ein niederländischer Maler des Goldenen Zeitalters, Meister von Licht und Schatten (Chiaroscuro)."
-        },
-        'leonardo': {
-            'en': "Leonardo da Vinci (1452-1519) was an Italian Renaissance polymath - painter, inventor, scientist.",
-            'ru': "Леонардо да Винчи (1452-1519) был итальянским универсалом эпохи Возрождения - художником, изобретателем, учёным.",
-            'de': "Leonardo da Vinci (1452-1519) war ein italienischer Renaissance-Universalgelehrter - Maler, Erfinder, Wissenschaftler."
-        },
-        'picasso': {
-            'en': "Pablo Picasso (1881-1973) was a Spanish painter and co-founder of Cubism.",
-            'ru': "Пабло Пикассо (1881-1973) был испанским художником и соосно вателем кубизма.",
-            'de': "Pablo Picasso (1881-1973) war ein spanischer Maler und Mitbegründer des Kubismus."
-        }
-    }
-    
-    for key, context_dict in contexts.items():
-        if key in artist_lower:
-            return context_dict.get(lang, context_dict['en'])
-    
-    if lang == 'ru':
-        return f"{artist} был значимым художником, внёсшим вклад в историю искусства."
-    elif lang == 'de':
-        return f"{artist} war ein bedeutender Künstler, der zur Kunstgeschichte beitrug."
-    else:
-        return f"{artist} was a significant artist who contributed to art history."
-
-def get_period_information(period: str, lang: str) -> str:
-    """Get period information in user's language"""
-    periods = {
-        'Renaissance': {
-            'en': "The Renaissance (14th-17th century) marked a cultural rebirth emphasizing humanism, realism, and classical inspiration.",
-            'ru': "Ренессанс (14-17 века) ознаменовал культурное возрождение с акцентом на гуманизм, реализм и классическое вдохновение.",
-            'de': "Die Renaissance (14.-17. Jahrhundert) markierte eine kulturelle Wiedergeburt mit Betonung auf Humanismus, Realismus und klassischer Inspiration."
-        },
-        'Baroque': {
-            'en': "The Baroque period (1600-1750) featured dramatic expression, rich colors, and intense light and shadow contrasts.",
-            'ru': "Период барокко (1600-1750) характеризовался драматическим выражением, насыщенными цветами и интенсивными контрастами света и тени.",
-            'de': "Die Barockzeit (1600-1750) zeichnete sich durch dramatischen Ausdruck, reiche Farben und intensive Hell-Dunkel-Kontraste aus."
-        },
-        'Impressionism': {
-            'en': "Impressionism (1860-1890) revolutionized art with visible brushstrokes and emphasis on light effects.",
-            'ru': "Импрессионизм (1860-1890) революционизировал искусство видимыми мазками кисти и акцентом на световых эффектах.",
-            'de': "Der Impressionismus (1860-1890) revolutionierte die Kunst mit sichtbaren Pinselstrichen und Betonung auf Lichteffekten."
-        }
-    }
-    
-    if period in periods:
-        return periods[period].get(lang, periods[period]['en'])
-    
-    if lang == 'ru':
-        return f"Это произведение принадлежит к периоду {period}."
-    elif lang == 'de':
-        return f"Dieses Werk gehört zur Periode {period}."
-    else:
-        return f"This work belongs to the {period} period."
-
-def get_artistic_characteristics(artist: str, period: str, title: str, lang: str) -> str:
-    """Get artistic characteristics in user's language"""
-    characteristics = []
-    artist_lower = artist.lower()
-    
-    if 'van gogh' in artist_lower:
-        if lang == 'ru':
-            characteristics.append("смелые мазки и яркие цвета")
-        elif lang == 'de':
-            characteristics.append("kühne Pinselstriche und lebendige Farben")
-        else:
-            characteristics.append("bold brushstrokes and vibrant colors")
-    elif 'monet' in artist_lower:
-        if lang == 'ru':
-            characteristics.append("импрессионистские световые эффекты")
-        elif lang == 'de':
-            characteristics.append("impressionistische Lichteffekte")
-        else:
-            characteristics.append("impressionist light effects")
-    
-    if characteristics:
-        return ", ".join(characteristics)
-    
-    if lang == 'ru':
-        return "уникальное художественное видение"
-    elif lang == 'de':
-        return "einzigartige künstlerische Vision"
-    else:
-        return "distinctive artistic vision"
+    return descriptions.description(artwork, lang)
 
 # ==================== CALLBACK HANDLERS ====================
 async def period_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle period selection"""
     query = update.callback_query
     await query.answer()
-    lang = context.user_data.get('language', 'en')
+    lang = get_user_language(context)
     
     period = query.data.split('_')[1]
     period_queries = {'renaissance': 'Renaissance', 'baroque': 'Baroque', 
@@ -740,69 +610,190 @@ async def period_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     await query.edit_message_text(f"🔍 {get_text(lang, 'searching')}")
     
-    artworks = met.search_artworks(period_queries[period], max_results=3)
+    artworks = await met.search_artworks(period_queries[period], max_results=3)
+    db.record_search(update.effective_user, period_queries[period], [period_queries[period]], len(artworks), 'period')
     
     if not artworks:
         await query.message.reply_text(get_text(lang, 'no_artworks'), parse_mode='Markdown')
         return
+    page_token = pager.open(await met.search_ids(period_queries[period]), artworks)
     
     await query.message.reply_text(get_text(lang, 'found_artworks', count=len(artworks)), parse_mode='Markdown')
     
-    for artwork in artworks:
-        if artwork.get('image_url'):
-            description = generate_detailed_description(artwork, lang)
-            caption = f"""🗽 **{artwork['title']}**
-
-👨‍🎨 **{get_text(lang, 'artist_name')}:** {artwork['artist']}
-📅 **{get_text(lang, 'year')}:** {artwork.get('date', 'Unknown')}
-
-{description}"""
-            
-            try:
-                await query.message.reply_photo(photo=artwork['image_url'], caption=caption[:1024], parse_mode='Markdown')
-            except Exception as e:
-                print(f"Error: {e}")
+    await send_artwork_album(
+        query.message,
+        [(artwork, build_caption(artwork, lang, with_museum=False)) for artwork in artworks],
+        file_cache=met.cache,
+        image_proxy=image_proxy
+    )
+    db.record_views(update.effective_user, artworks)
+    await offer_more(query.message, artworks, lang, page_token)
 
 async def artist_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle artist selection"""
     query = update.callback_query
     await query.answer()
-    lang = context.user_data.get('language', 'en')
+    lang = get_user_language(context)
     
     artist = query.data.split('_', 1)[1]
     await query.edit_message_text(f"🔍 {get_text(lang, 'searching')}")
     
-    artworks = met.search_artworks(artist, max_results=3)
+    artworks = await met.search_artworks(artist, max_results=3)
+    db.record_search(update.effective_user, artist, [artist], len(artworks), 'artist')
     
     if not artworks:
         await query.message.reply_text(get_text(lang, 'no_artworks'), parse_mode='Markdown')
         return
+    page_token = pager.open(await met.search_ids(artist), artworks)
     
     await query.message.reply_text(get_text(lang, 'found_artworks', count=len(artworks)), parse_mode='Markdown')
     
-    for artwork in artworks:
-        if artwork.get('image_url'):
-            description = generate_detailed_description(artwork, lang)
-            caption = f"""🗽 **{artwork['title']}**
+    await send_artwork_album(
+        query.message,
+        [(artwork, build_caption(artwork, lang, with_museum=False)) for artwork in artworks],
+        file_cache=met.cache,
+        image_proxy=image_proxy
+    )
+    db.record_views(update.effective_user, artworks)
+    await offer_more(query.message, artworks, lang, page_token)
 
-👨‍🎨 **{get_text(lang, 'artist_name')}:** {artwork['artist']}
-📅 **{get_text(lang, 'year')}:** {artwork.get('date', 'Unknown')}
+async def similar_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle "Similar works": neighbours come from the precomputed index, no search"""
+    query = update.callback_query
+    await query.answer()
+    lang = get_user_language(context)
+    
+    object_id = int(query.data.split('_', 1)[1])
+    neighbours = similar.neighbours(object_id)
+    artworks = await met.get_artworks(neighbours, max_results=3)
+    
+    if not artworks:
+        await query.message.reply_text(get_text(lang, 'error_find'))
+        return
+    page_token = pager.open(neighbours, artworks)
+    
+    await query.message.reply_text(get_text(lang, 'similar_found'))
+    
+    await send_artwork_album(
+        query.message,
+        [(artwork, build_caption(artwork, lang, with_museum=False)) for artwork in artworks],
+        file_cache=met.cache,
+        image_proxy=image_proxy
+    )
+    db.record_views(update.effective_user, artworks)
+    await offer_more(query.message, artworks, lang, page_token)
 
-{description}"""
-            
-            try:
-                await query.message.reply_photo(photo=artwork['image_url'], caption=caption[:1024], parse_mode='Markdown')
-            except Exception as e:
-                print(f"Error: {e}")
+async def page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle "Next page": the cursor's next page was prefetched while the user was reading"""
+    query = update.callback_query
+    await query.answer()
+    lang = get_user_language(context)
+    
+    page_token = query.data.split('_', 1)[1]
+    page = await pager.next_page(page_token)
+    if page is None:
+        await query.message.reply_text(get_text(lang, 'page_expired'))
+        return
+    
+    artworks, has_more = page
+    if not artworks:
+        await query.message.reply_text(get_text(lang, 'error_find'))
+        return
+    
+    # The previous page keeps its "Similar works" buttons, its "Next page" has done its job
+    if query.message.reply_markup:
+        keyboard = [row for row in query.message.reply_markup.inline_keyboard
+                    if not row[0].callback_data.startswith('page_')]
+        await query.edit_message_reply_markup(reply_markup=InlineKeyboardMarkup(keyboard) if keyboard else None)
+    
+    await send_artwork_album(
+        query.message,
+        [(artwork, build_caption(artwork, lang, with_museum=False)) for artwork in artworks],
+        file_cache=met.cache,
+        image_proxy=image_proxy
+    )
+    db.record_views(update.effective_user, artworks)
+    await offer_more(query.message, artworks, lang, page_token if has_more else None)
 
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle errors"""
     print(f"Error: {context.error}")
     if update and update.effective_message:
-        lang = context.user_data.get('language', 'en')
+        lang = get_user_language(context)
         await update.effective_message.reply_text(get_text(lang, 'error_general'))
 
 # ==================== MAIN ====================
+# Seconds between log lines with Met hedging stats (0 turns them off)
+UPSTREAM_STATS_INTERVAL = float(os.getenv('UPSTREAM_STATS_INTERVAL', '600'))
+stats_task = None
+
+async def log_upstream_stats():
+    """Print the Met hedging counters and latency percentiles now and then"""
+    while True:
+        await asyncio.sleep(UPSTREAM_STATS_INTERVAL)
+        print(f"📊 {met.hedging.summary()}")
+
+async def start_background_jobs(application: Application):
+    """Warm up the random artwork pool and start the analytics writer"""
+    global stats_task
+    random_pool.start()
+    db.start()
+    if UPSTREAM_STATS_INTERVAL and met.hedging is not None:
+        stats_task = asyncio.ensure_future(log_upstream_stats())
+
+async def close_clients(application: Application):
+    """Close shared HTTP clients on shutdown"""
+    if stats_task is not None:
+        stats_task.cancel()
+        print(f"📊 {met.hedging.summary()}")
+    await random_pool.close()
+    pager.close()
+    await met.close()
+    await image_proxy.close()
+    await db.close()
+    state.close()
+    met.cache.close()
+    met.mirror.close()
+    similar.close()
+
+def build_application(token: str, update_processor=None, base_url: str = None, with_updater: bool = True) -> Application:
+    """Create the Application with all handlers registered.
+
+    update_processor enables concurrent update handling (see webhook.py),
+    base_url points the bot at another Bot API server (e.g. fake_telegram.py),
+    with_updater=False is for workers that get updates from cluster.py.
+    """
+    builder = (
+        Application.builder()
+        .token(token)
+        .persistence(UsersTablePersistence(db))
+        .post_init(start_background_jobs)
+        .post_shutdown(close_clients)
+    )
+    if not with_updater:
+        builder = builder.updater(None)
+    if update_processor is not None:
+        builder = builder.concurrent_updates(update_processor)
+    if base_url:
+        builder = builder.base_url(base_url)
+    app = builder.build()
+    
+    # Handlers
+    app.add_handler(CommandHandler("start", start))
+    app.add_handler(CommandHandler("help", help_command))
+    app.add_handler(CommandHandler("random", random_artwork))
+    app.add_handler(CallbackQueryHandler(language_callback, pattern='^lang_'))
+    app.add_handler(CallbackQueryHandler(period_callback, pattern='^period_'))
+    app.add_handler(CallbackQueryHandler(artist_callback, pattern='^artist_'))
+    app.add_handler(CallbackQueryHandler(similar_callback, pattern='^similar_'))
+    app.add_handler(CallbackQueryHandler(page_callback, pattern='^page_'))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, advanced_search))
+    
+    # Error handler (use add_error_handler, not add_handler)
+    app.add_error_handler(error_handler)
+    
+    return app
+
 def main():
     """Start the bot"""
     token = os.getenv('TELEGRAM_TOKEN')
@@ -819,19 +810,7 @@ def main():
     except Exception as e:
         print(f"⚠️ Ollama not available: {e}")
     
-    app = Application.builder().token(token).build()
-    
-    # Handlers
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("help", help_command))
-    app.add_handler(CommandHandler("random", random_artwork))
-    app.add_handler(CallbackQueryHandler(language_callback, pattern='^lang_'))
-    app.add_handler(CallbackQueryHandler(period_callback, pattern='^period_'))
-    app.add_handler(CallbackQueryHandler(artist_callback, pattern='^artist_'))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, advanced_search))
-    
-    # Error handler (use add_error_handler, not add_handler)
-    app.add_error_handler(error_handler)
+    app = build_application(token)
     
     print("🤖 🎨 Multilingual Art Museum Bot is running...")
     print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
@@ -0,0 +1,244 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+
+import httpx
+import tornado.web
+from dotenv import load_dotenv
+from telegram import Bot, Update
+
+load_dotenv()
+
+# Scale-out mode: one webhook ingress in front of N bot worker processes.
+#
+# Telegram calls the ingress. The ingress sends every update of a chat to the
+# same worker (rendezvous hashing on chat_id), one at a time and in arrival
+# order, so per-chat order holds. Each worker is a full bot_ai Application
+# without an Updater; caches live in the shared state backend (STATE_BACKEND,
+# SQLite WAL by default) and user preferences in the users table of
+# ultra_art_bot.db, so workers can restart or be added without users losing
+# their settings. The Met rate limit (MET_RATE_LIMIT) is split between the
+# workers, so together they stay under it.
+#
+# Settings (.env): the webhook.py ones plus
+#     CLUSTER_WORKERS       number of worker processes (default: CPU count)
+#     CLUSTER_WORKER_PORT   port of the first worker, others follow (default 9001)
+
+
+def chat_id_of(data):
+    """Chat (or user) id of a raw update, used as the routing key"""
+    for key in ('message', 'edited_message', 'channel_post', 'edited_channel_post'):
+        if key in data:
+            return data[key]['chat']['id']
+    if 'callback_query' in data:
+        query = data['callback_query']
+        if query.get('message'):
+            return query['message']['chat']['id']
+        return query['from']['id']
+    for value in data.values():
+        if isinstance(value, dict) and isinstance(value.get('from'), dict):
+            return value['from']['id']
+    return 0
+
+
+def pick_worker(chat_id, workers):
+    """Rendezvous hashing: stable chat -> worker, few chats move when N changes"""
+    return max(range(workers), key=lambda i: hashlib.md5(f"{chat_id}:{i}".encode()).digest())
+
+
+# ==================== WORKER ====================
+class WorkerUpdateHandler(tornado.web.RequestHandler):
+    def initialize(self, bot_app):
+        self.bot_app = bot_app
+
+    def check_xsrf_cookie(self):
+        pass
+
+    def get(self):
+        self.write('ok')  # readiness check for the ingress
+
+    async def post(self):
+        update = Update.de_json(json.loads(self.request.body), self.bot_app.bot)
+        await self.bot_app.update_queue.put(update)
+        self.set_status(200)
+
+
+async def _run_worker(index, port, token, max_updates, base_url):
+    # bot_ai builds its Met client on import, with MET_RATE_LIMIT (set by run_worker)
+    from bot_ai import build_application
+    from update_processor import ChatOrderedUpdateProcessor
+
+    app = build_application(
+        token,
+        update_processor=ChatOrderedUpdateProcessor(max_updates),
+        base_url=base_url,
+        with_updater=False,
+    )
+
+    server = tornado.web.Application([(r"/update", WorkerUpdateHandler, {'bot_app': app})])
+    http_server = server.listen(port, address='127.0.0.1')
+
+    # SIGTERM (from the ingress process) and SIGINT (Ctrl+C) both shut down cleanly
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # Windows
+            signal.signal(sig, lambda *_: loop.call_soon_threadsafe(stop.set))
+
+    # Same order as Application.run_webhook: the persistence is flushed in
+    # shutdown(), so post_shutdown (which closes the database) comes last
+    await app.initialize()
+    try:
+        if app.post_init:
+            await app.post_init(app)
+        await app.start()
+        print(f"👷 Worker {index} ready on 127.0.0.1:{port}")
+        try:
+            await stop.wait()
+        finally:
+            http_server.stop()
+            await app.stop()
+            if app.post_stop:
+                await app.post_stop(app)
+    finally:
+        await app.shutdown()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
+
+
+def run_worker(index, port, token, max_updates, base_url, met_rate):
+    os.environ['MET_RATE_LIMIT'] = str(met_rate)
+    try:
+        asyncio.run(_run_worker(index, port, token, max_updates, base_url))
+    except KeyboardInterrupt:
+        pass
+
+
+# ==================== INGRESS ====================
+class IngressHandler(tornado.web.RequestHandler):
+    def initialize(self, ingress):
+        self.ingress = ingress
+
+    def check_xsrf_cookie(self):
+        pass
+
+    async def post(self):
+        secret = self.ingress.secret
+        if secret and self.request.headers.get('X-Telegram-Bot-Api-Secret-Token') != secret:
+            self.set_status(403)
+            return
+
+        ok = await self.ingress.forward(self.request.body)
+        # Anything but 200 makes Telegram deliver the update again later
+        self.set_status(200 if ok else 503)
+
+
+class Ingress:
+    def __init__(self, worker_ports, secret=None):
+        self.worker_ports = worker_ports
+        self.secret = secret
+        self._client = httpx.AsyncClient(timeout=10)
+        self._chat_locks = {}
+
+    async def wait_for_workers(self, timeout=60):
+        """Wait until every worker answers, so the webhook is only set once they can take updates"""
+        deadline = asyncio.get_running_loop().time() + timeout
+        for port in self.worker_ports:
+            while True:
+                try:
+                    response = await self._client.get(f"http://127.0.0.1:{port}/update")
+                    if response.status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                if asyncio.get_running_loop().time() > deadline:
+                    raise RuntimeError(f"worker on port {port} did not start")
+                await asyncio.sleep(0.5)
+
+    async def forward(self, body):
+        chat_id = chat_id_of(json.loads(body))
+        port = self.worker_ports[pick_worker(chat_id, len(self.worker_ports))]
+
+        # One update per chat in flight, so the worker queues them in order
+        entry = self._chat_locks.setdefault(chat_id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                response = await self._client.post(f"http://127.0.0.1:{port}/update", content=body)
+                return response.status_code == 200
+        except httpx.HTTPError as e:
+            print(f"Ingress error (worker on port {port}): {e}")
+            return False
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[chat_id]
+
+
+async def run_ingress(token, worker_ports):
+    listen = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+    port = int(os.getenv('WEBHOOK_PORT', '8443'))
+    url_path = os.getenv('WEBHOOK_PATH', 'telegram')
+    secret = os.getenv('WEBHOOK_SECRET')
+    base_url = os.getenv('TELEGRAM_API_BASE_URL')
+
+    ingress = Ingress(worker_ports, secret)
+    await ingress.wait_for_workers()
+    server = tornado.web.Application([(rf"/{url_path}", IngressHandler, {'ingress': ingress})])
+    server.listen(port, address=listen)
+
+    bot = Bot(token, base_url=base_url) if base_url else Bot(token)
+    async with bot:
+        await bot.set_webhook(
+            url=f"{os.getenv('WEBHOOK_URL').rstrip('/')}/{url_path}",
+            secret_token=secret,
+            allowed_updates=Update.ALL_TYPES,
+        )
+
+    print(f"🤖 🎨 Ingress on {listen}:{port}/{url_path} → {len(worker_ports)} workers")
+    await asyncio.Event().wait()
+
+
+def main():
+    token = os.getenv('TELEGRAM_TOKEN')
+    if not token or not os.getenv('WEBHOOK_URL'):
+        print("❌ Error: TELEGRAM_TOKEN and WEBHOOK_URL must be set!")
+        return
+
+    workers = int(os.getenv('CLUSTER_WORKERS', str(os.cpu_count() or 2)))
+    first_port = int(os.getenv('CLUSTER_WORKER_PORT', '9001'))
+    max_updates = int(os.getenv('WEBHOOK_MAX_WORKERS', '64'))
+    base_url = os.getenv('TELEGRAM_API_BASE_URL')
+    met_rate = float(os.getenv('MET_RATE_LIMIT', '40')) / workers
+    worker_ports = [first_port + i for i in range(workers)]
+
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=run_worker, args=(i, port, token, max_updates, base_url, met_rate), daemon=True)
+        for i, port in enumerate(worker_ports)
+    ]
+    for process in processes:
+        process.start()
+
+    # `kill`/systemd stop the cluster like Ctrl+C, so the workers get stopped below
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        asyncio.run(run_ingress(token, worker_ports))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()  # SIGTERM: the worker flushes and closes its databases
+        for process in processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.kill()
+
+
+if __name__ == '__main__':
+    main()
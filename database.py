@@ -0,0 +1,372 @@
+import asyncio
+import datetime
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+
+def _now():
+    """Same format as SQLite CURRENT_TIMESTAMP (UTC)"""
+    return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+# user_data keys kept in columns of the users table (see persistence.py)
+USER_PREF_COLUMNS = ('language',)
+
+
+def normalize_query(text):
+    """'Monet Water Lilies!' and 'monet  water lilies' are the same query"""
+    return ' '.join(re.findall(r'\w+', (text or '').lower()))
+
+
+def _has_column(conn, table, column):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+
+def _add_column(table, column, declaration):
+    """Migration step adding a column, skipped if the column already exists"""
+    def step(conn):
+        if not _has_column(conn, table, column):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+    return step
+
+
+def _add_normalized_query(conn):
+    _add_column('search_history', 'normalized_query', 'TEXT')(conn)
+    conn.create_function('normalize_query', 1, normalize_query, deterministic=True)
+    conn.execute("UPDATE search_history SET normalized_query = normalize_query(query) "
+                 "WHERE normalized_query IS NULL")
+
+
+# Schema migrations, applied in order; PRAGMA user_version holds the last one
+# applied. Append new steps at the end, never edit or reorder released ones.
+# A step is SQL (statements separated by ';') or a function taking the
+# connection; each step runs in one transaction together with the version bump.
+# Columns are added with _add_column, which skips columns that already exist.
+MIGRATIONS = [
+    # 1: normalized query column for "top queries" grouping
+    _add_normalized_query,
+    # 2: covering indexes for per-user history, top queries and per-artwork counters
+    """
+    CREATE INDEX IF NOT EXISTS idx_search_history_user_time
+        ON search_history (user_id, timestamp, query, results_count);
+    CREATE INDEX IF NOT EXISTS idx_search_history_time_query
+        ON search_history (timestamp, normalized_query);
+    CREATE INDEX IF NOT EXISTS idx_search_history_query
+        ON search_history (normalized_query, timestamp);
+    CREATE INDEX IF NOT EXISTS idx_quiz_results_user_time
+        ON quiz_results (user_id, timestamp, correct);
+    CREATE INDEX IF NOT EXISTS idx_quiz_results_artwork
+        ON quiz_results (artwork_id, correct);
+    CREATE INDEX IF NOT EXISTS idx_favorites_artwork
+        ON favorites (artwork_id);
+    """,
+    # 3: user preferences for UsersTablePersistence
+    _add_column('users', 'language', 'TEXT'),
+    # 4: when the preferences last changed (unix time), so workers notice newer rows
+    _add_column('users', 'prefs_updated', 'REAL'),
+]
+
+
+def migrate(conn):
+    """Bring the schema up to the latest version; returns the versions applied"""
+    applied = []
+    while True:
+        with conn:
+            # IMMEDIATE takes the write lock before user_version is read, so
+            # worker processes starting together apply each step only once
+            conn.execute("BEGIN IMMEDIATE")
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            if current >= len(MIGRATIONS):
+                break
+            step = MIGRATIONS[current]
+            if callable(step):
+                step(conn)
+            else:
+                for statement in step.split(';'):
+                    if statement.strip():
+                        conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {current + 1}")
+        applied.append(current + 1)
+    if applied:
+        conn.execute("ANALYZE")
+    return applied
+
+
+class ArtBotDatabase:
+    """Writes users, searches and artwork views to ultra_art_bot.db.
+
+    Handlers only append to an in-memory queue (no I/O, no await), so
+    recording analytics never delays a reply. A single writer task flushes
+    the queue every `flush_interval` seconds (or sooner when `batch_size`
+    records are waiting) in one transaction, in a worker thread. Repeated
+    views of the same artwork and repeated activity of the same user within
+    a batch are merged into one upsert.
+
+    User preferences are kept apart from the analytics queue: they are
+    never dropped when the writer falls behind, a batch that fails to write
+    puts them back for the next flush, and prefs listeners are told about
+    them only once they are committed.
+
+    The file is opened (and migrated) by open(), which start() calls, so
+    creating the object at import time touches no file.
+    """
+
+    def __init__(self, db_path="ultra_art_bot.db", flush_interval=2.0, batch_size=200, max_pending=50000):
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.stats = {'queued': 0, 'written': 0, 'dropped': 0, 'flushes': 0}
+
+        self._pending = []
+        # user_id -> {column: value, 'prefs_updated': ...}, merged; queued and being written
+        self._pending_prefs = {}
+        self._writing_prefs = {}
+        self._prefs_listeners = []
+        self._writer_task = None
+        self._wakeup = None
+        self._stopping = False
+        # One batch at a time on the write connection (writer task, PTB's persistence flush)
+        self._flush_lock = asyncio.Lock()
+
+        self._conn = None
+        # Stats queries use their own connection so they never wait for a flush
+        self._read_lock = threading.Lock()
+        self._read_conn = None
+
+    def open(self):
+        """Connect and apply pending migrations (once; later calls do nothing)"""
+        if self._conn is not None:
+            return
+        conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        migrate(conn)
+        self._conn = conn
+        self._read_conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+
+    # ==================== RECORDING (called from handlers) ====================
+    def record_search(self, user, query, keywords, results_count, search_type, ai_interpretation=None,
+                      search_attempts=1):
+        """Queue a search_history row and count the search for the user"""
+        self._touch_user(user, searches=1, advanced=1 if search_type == 'normal' else 0)
+        if user is None:
+            return
+        self._enqueue(('search', (
+            user.id,
+            query,
+            normalize_query(query),
+            json.dumps(keywords, ensure_ascii=False),
+            ai_interpretation,
+            len(keywords),
+            json.dumps(sorted(keywords), ensure_ascii=False),
+            results_count,
+            search_type,
+            json.dumps({'keywords_used': keywords, 'search_attempts': search_attempts}, ensure_ascii=False),
+            _now(),
+        )))
+
+    def record_views(self, user, artworks):
+        """Queue view counters for the artworks shown to a user"""
+        self._touch_user(user)
+        now = _now()
+        for artwork in artworks:
+            if artwork.get('object_id') is not None:
+                self._enqueue(('view', int(artwork['object_id']), now))
+
+    def record_user_prefs(self, user_id, prefs, updated_at=None):
+        """Queue new values for USER_PREF_COLUMNS of a user (None clears one); never dropped"""
+        values = {key: prefs[key] for key in USER_PREF_COLUMNS if key in prefs}
+        if values:
+            values['prefs_updated'] = updated_at or time.time()
+            self._pending_prefs.setdefault(user_id, {}).update(values)
+            self.stats['queued'] += 1
+
+    def queued_prefs(self, user_id):
+        """Preference values of a user that are queued or being written, not yet committed"""
+        return {**self._writing_prefs.get(user_id, {}), **self._pending_prefs.get(user_id, {})}
+
+    def add_prefs_listener(self, callback):
+        """Call callback(user_id, values) after values from record_user_prefs are committed"""
+        self._prefs_listeners.append(callback)
+
+    def _touch_user(self, user, searches=0, advanced=0):
+        if user is not None:
+            self._enqueue(('user', user.id, user.username, searches, advanced, _now()))
+
+    def _enqueue(self, record):
+        if len(self._pending) >= self.max_pending:
+            self.stats['dropped'] += 1  # writer is far behind: analytics are not worth memory
+            return
+        self._pending.append(record)
+        self.stats['queued'] += 1
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    # ==================== WRITER ====================
+    def start(self):
+        """Open the database and start the writer task (call from a running event loop)"""
+        self.open()
+        if self._writer_task is None or self._writer_task.done():
+            self._wakeup = asyncio.Event()
+            self._writer_task = asyncio.ensure_future(self._writer())
+
+    async def _writer(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write everything queued so far"""
+        if not self._pending and not self._pending_prefs:
+            return
+        self.open()
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            prefs, self._pending_prefs = self._pending_prefs, {}
+            if not batch and not prefs:
+                return
+            self._writing_prefs = prefs
+            try:
+                await asyncio.to_thread(self._write_batch, batch, prefs)
+            except Exception as e:
+                print(f"Database Error: {e}")
+                # Analytics of the batch are lost; preferences go back to the queue
+                for user_id, values in prefs.items():
+                    self._pending_prefs[user_id] = {**values, **self._pending_prefs.get(user_id, {})}
+                return
+            finally:
+                self._writing_prefs = {}
+            self.stats['written'] += len(batch) + len(prefs)
+            self.stats['flushes'] += 1
+            for user_id, values in prefs.items():
+                for callback in self._prefs_listeners:
+                    callback(user_id, values)
+
+    def _write_batch(self, batch, prefs):
+        users = {}
+        user_counts = defaultdict(lambda: [0, 0])
+        views = defaultdict(int)
+        last_view = {}
+        searches = []
+
+        for record in batch:
+            kind = record[0]
+            if kind == 'user':
+                _, user_id, username, searches_delta, advanced_delta, ts = record
+                users[user_id] = (username, ts)
+                user_counts[user_id][0] += searches_delta
+                user_counts[user_id][1] += advanced_delta
+            elif kind == 'search':
+                searches.append(record[1])
+            elif kind == 'view':
+                views[record[1]] += 1
+                last_view[record[1]] = record[2]
+
+        with self._conn:
+            self._conn.executemany("""
+                INSERT INTO users (user_id, username, total_searches, advanced_searches, last_active)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    username = excluded.username,
+                    total_searches = total_searches + excluded.total_searches,
+                    advanced_searches = advanced_searches + excluded.advanced_searches,
+                    last_active = excluded.last_active
+            """, [(user_id, username, *user_counts[user_id], ts) for user_id, (username, ts) in users.items()])
+
+            self._conn.executemany("""
+                INSERT INTO search_history (user_id, query, normalized_query, keywords, ai_interpretation,
+                                            complexity_score, semantic_tags, results_count, search_type,
+                                            filters_used, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, searches)
+
+            self._conn.executemany("""
+                INSERT INTO artwork_analytics (artwork_id, view_count, last_accessed)
+                VALUES (?, ?, ?)
+                ON CONFLICT(artwork_id) DO UPDATE SET
+                    view_count = view_count + excluded.view_count,
+                    last_accessed = excluded.last_accessed
+            """, [(artwork_id, count, last_view[artwork_id]) for artwork_id, count in views.items()])
+
+            for user_id, values in prefs.items():
+                columns = ', '.join(values)
+                updates = ', '.join(f"{column} = excluded.{column}" for column in values)
+                self._conn.execute(
+                    f"INSERT INTO users (user_id, {columns}) VALUES (?{', ?' * len(values)}) "
+                    f"ON CONFLICT(user_id) DO UPDATE SET {updates}",
+                    (user_id, *values.values())
+                )
+
+    # ==================== STATS ====================
+    async def user_history(self, user_id, limit=10):
+        """Latest searches of a user: [(query, results_count, timestamp)]"""
+        return await self._read("""
+            SELECT query, results_count, timestamp FROM search_history
+            WHERE user_id = ? ORDER BY timestamp DESC LIMIT ?
+        """, (user_id, limit))
+
+    async def top_queries(self, since, limit=10):
+        """Most frequent queries since a 'YYYY-MM-DD HH:MM:SS' timestamp: [(query, count)]"""
+        return await self._read("""
+            SELECT normalized_query, COUNT(*) AS searches FROM search_history
+            WHERE timestamp >= ? AND normalized_query != ''
+            GROUP BY normalized_query ORDER BY searches DESC LIMIT ?
+        """, (since, limit))
+
+    async def query_count(self, query):
+        """How many times a query has been searched"""
+        rows = await self._read(
+            "SELECT COUNT(*) FROM search_history WHERE normalized_query = ?", (normalize_query(query),)
+        )
+        return rows[0][0]
+
+    async def artwork_stats(self, artwork_id):
+        """Views, favorites and quiz answers of one artwork"""
+        rows = await self._read("""
+            SELECT
+                (SELECT view_count FROM artwork_analytics WHERE artwork_id = :id),
+                (SELECT COUNT(*) FROM favorites WHERE artwork_id = :id),
+                (SELECT COUNT(*) FROM quiz_results WHERE artwork_id = :id),
+                (SELECT COUNT(*) FROM quiz_results WHERE artwork_id = :id AND correct)
+        """, {'id': artwork_id})
+        views, favorites, quiz_answers, quiz_correct = rows[0]
+        return {'views': views or 0, 'favorites': favorites, 'quiz_answers': quiz_answers,
+                'quiz_correct': quiz_correct}
+
+    async def load_user_prefs(self, user_id, columns=USER_PREF_COLUMNS):
+        """Stored preferences of a user, without the unset ones"""
+        rows = await self._read(f"SELECT {', '.join(columns)} FROM users WHERE user_id = ?", (user_id,))
+        if not rows:
+            return {}
+        return {column: value for column, value in zip(columns, rows[0]) if value is not None}
+
+    async def _read(self, sql, params):
+        self.open()
+        return await asyncio.to_thread(self._read_sync, sql, params)
+
+    def _read_sync(self, sql, params):
+        with self._read_lock:
+            return self._read_conn.execute(sql, params).fetchall()
+
+    async def close(self):
+        """Stop the writer and flush what is left"""
+        if self._writer_task is not None and not self._writer_task.done():
+            # Not cancel(): a batch may be half written in a worker thread
+            self._stopping = True
+            self._wakeup.set()
+            await self._writer_task
+        await self.flush()
+        if self._conn is None:
+            return
+        self._conn.close()
+        with self._read_lock:
+            self._read_conn.close()
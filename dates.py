@@ -0,0 +1,196 @@
+import re
+from bisect import bisect_right
+from functools import lru_cache
+
+# Met date strings ("ca. 1870–75", "19th century", "1st century B.C.",
+# "ca. 2000–1800 B.C.", "1880s", "A.D. 100–200", ...) and the numeric
+# objectBeginDate/objectEndDate fields turned into (begin, end) years, and
+# years mapped to art periods. Years before Christ are negative; there is no
+# year 0 in the strings, but Met's numeric fields use -1 for 1 B.C. too.
+
+# Sorted interval table: PERIOD_NAMES[i] covers [PERIOD_STARTS[i - 1], PERIOD_STARTS[i])
+PERIOD_STARTS = [500, 1400, 1600, 1700, 1800, 1850, 1890, 1910, 1950]
+PERIOD_NAMES = ['Ancient', 'Medieval', 'Renaissance', 'Baroque', '18th Century', 'Romanticism',
+                'Impressionism', 'Post-Impressionism', 'Modern Art', 'Contemporary']
+
+_BC = re.compile(r'\b(?:b\.\s?c\.(?:\s?e\.)?|bce?)(?=\W|$)')
+_AD = re.compile(r'(?:\ba\.\s?d\.|\bad\b|\bce\b)')
+_NOISE = re.compile(r'\b(?:ca|c|circa|about|approx|probably|possibly|dated|before|after)\.?|\?')
+_SEPARATOR = re.compile(r'\s*(?:-|/|\bto\b|\bor\b)\s*')
+
+_ORDINAL = r'\b(\d{1,2})(?:st|nd|rd|th)\b'
+_MODIFIER = (r'(early|mid|late|(?:first|1st|second|2nd) half|'
+             r'(?:first|1st|second|2nd|third|3rd|fourth|4th|last) quarter)?(?:\s+of)?(?:\s+the)?\s*-?\s*')
+_MILLENNIUM = re.compile(_MODIFIER + _ORDINAL + r'(?:\s*millennium)')
+_CENTURY = re.compile(_MODIFIER + _ORDINAL + r'(?:\s*(century|centuries))?')
+_DECADE = re.compile(r'(early|mid|late)?\s*-?\s*\b(\d{1,3}0)\'?s\b')
+_YEAR = re.compile(r'\b(\d{1,5})\b')
+
+# Part of a span (as fractions) a modifier refers to
+_PARTS = {
+    None: (0.0, 1.0),
+    'early': (0.0, 1 / 3),
+    'mid': (1 / 3, 2 / 3),
+    'late': (2 / 3, 1.0),
+    'first half': (0.0, 0.5),
+    'second half': (0.5, 1.0),
+    'first quarter': (0.0, 0.25),
+    'second quarter': (0.25, 0.5),
+    'third quarter': (0.5, 0.75),
+    'fourth quarter': (0.75, 1.0),
+    'last quarter': (0.75, 1.0),
+}
+_ORDINAL_WORDS = {'1st': 'first', '2nd': 'second', '3rd': 'third', '4th': 'fourth'}
+
+
+def _part(modifier, first, last):
+    """Sub-range of [first, last] named by a modifier like 'early' or 'second half'"""
+    if modifier:
+        number, _, rest = modifier.partition(' ')
+        modifier = f"{_ORDINAL_WORDS.get(number, number)} {rest}".strip()
+    start, stop = _PARTS[modifier]
+    span = last - first + 1
+    return first + int(span * start), first + int(span * stop) - 1
+
+
+def _span(number, size, bc):
+    """Years of the number-th century/millennium (size 100/1000)"""
+    if bc:
+        return -number * size, -(number - 1) * size - 1
+    return (number - 1) * size, number * size - 1
+
+
+def _parse_side(text, bc, unit):
+    """(first, last, kind) of one side of a range, or None.
+
+    unit ('century'/'millennium') applies to a bare ordinal such as the
+    "18th" in "18th–19th century".
+    """
+    match = _MILLENNIUM.search(text)
+    if match or (unit == 'millennium' and _CENTURY.search(text)):
+        match = match or _CENTURY.search(text)
+        first, last = _span(int(match.group(2)), 1000, bc)
+        return _part(match.group(1), first, last) + ('millennium',)
+
+    # "2nd half 16th century": prefer the ordinal that is followed by "century"
+    matches = list(_CENTURY.finditer(text))
+    match = next((m for m in matches if m.group(3)), matches[0] if matches else None)
+    if match and (match.group(3) or unit == 'century'):
+        first, last = _span(int(match.group(2)), 100, bc)
+        return _part(match.group(1), first, last) + ('century',)
+
+    match = _DECADE.search(text)
+    if match:
+        first = int(match.group(2))
+        first, last = (-first - 9, -first) if bc else (first, first + 9)
+        return _part(match.group(1), first, last) + ('decade',)
+
+    match = _YEAR.search(text)
+    if match:
+        year = int(match.group(1))
+        return (-year, -year, 'year') if bc else (year, year, 'year')
+
+    return None
+
+
+def _unit_of(text):
+    if 'millenni' in text:
+        return 'millennium'
+    if 'centur' in text:
+        return 'century'
+    return None
+
+
+@lru_cache(maxsize=20000)
+def parse_date(text):
+    """(begin, end) years of a Met date string, or None if it has no date"""
+    if not text:
+        return None
+    text = text.lower().replace('–', '-').replace('—', '-').replace('‒', '-')
+    # Hyphens that are not ranges: "mid-19th century", "19th-century"
+    text = re.sub(r'\b(early|mid|late)-', r'\1 ', text)
+    text = re.sub(r'(st|nd|rd|th)-(centur|millenni)', r'\1 \2', text)
+    # "18th c.", "5th cent. B.C."
+    text = re.sub(r'\b(\d{1,2}(?:st|nd|rd|th))\s*c(?:ent)?\.?(?=\W|$)', r'\1 century', text)
+    # Thousands separators: "10,000 B.C."
+    text = re.sub(r'(?<=\d),(?=\d{3}\b)', '', text)
+
+    # "1885, printed 1890", "1850; reworked 1860": the first dated clause wins
+    for clause in re.split(r'[;,]', text):
+        years = _parse_clause(clause)
+        if years is not None:
+            return years
+    return None
+
+
+def _parse_clause(text):
+    text = _NOISE.sub(' ', text)
+    sides = _SEPARATOR.split(text.strip(), maxsplit=1)
+    sides = [side for side in sides if side.strip()]
+    if not sides:
+        return None
+
+    eras = [bool(_BC.search(side)) for side in sides]
+    explicit_ad = [bool(_AD.search(side)) for side in sides]
+    if len(sides) == 2 and not eras[0] and not explicit_ad[0] and eras[1]:
+        eras[0] = True  # "ca. 2000–1800 B.C."
+    unit = _unit_of(text)
+
+    parsed = []
+    for side, bc in zip(sides, eras):
+        side = _AD.sub(' ', _BC.sub(' ', side))
+        result = _parse_side(side, bc, unit)
+        if result is not None:
+            parsed.append((side, result))
+    if not parsed:
+        return None
+
+    first_side, (begin, end, kind) = parsed[0]
+    if len(parsed) == 2:
+        last_side, (last_begin, last_end, last_kind) = parsed[1]
+        if kind == last_kind and kind in ('year', 'decade') and begin > 0 and last_end < begin:
+            # Abbreviated end: "1870–75" -> 1875, "1870-5" -> 1875, "1880s–90s" -> 1890s
+            digits = str(last_begin)
+            full = str(begin)
+            if len(digits) < len(full):
+                offset = int(full[:len(full) - len(digits)] + digits) - last_begin
+                last_begin, last_end = last_begin + offset, last_end + offset
+        end = max(end, last_end)
+        begin = min(begin, last_begin)
+
+    return (begin, end) if begin <= end else (end, begin)
+
+
+def artwork_years(artwork):
+    """(begin, end) of an artwork: Met's objectBeginDate/objectEndDate, else its date string"""
+    begin, end = artwork.get('begin_date'), artwork.get('end_date')
+    if isinstance(begin, int) and isinstance(end, int) and (begin or end):
+        return (begin, end) if begin <= end else (end, begin)
+    return parse_date(artwork.get('date') or '')
+
+
+def period_for_year(year):
+    """Art period name of a year (bisect over the interval table)"""
+    return PERIOD_NAMES[bisect_right(PERIOD_STARTS, year)]
+
+
+def period_for_years(years):
+    """Period of a (begin, end) range: the period of its middle year; '' for None"""
+    if years is None:
+        return ''
+    return period_for_year((years[0] + years[1]) // 2)
+
+
+def periods_overlapping(begin, end):
+    """All period names a (begin, end) range touches, oldest first (for filtering)"""
+    return PERIOD_NAMES[bisect_right(PERIOD_STARTS, begin):bisect_right(PERIOD_STARTS, end) + 1]
+
+
+def determine_period(date_str):
+    """Art period of a Met date string, '' if it has no recognisable date"""
+    return period_for_years(parse_date(date_str or ''))
+
+
+def artwork_period(artwork):
+    """Art period of an artwork, '' if its date is unknown"""
+    return period_for_years(artwork_years(artwork))
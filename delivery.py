@@ -0,0 +1,106 @@
+import asyncio
+
+from telegram import InputMediaPhoto
+from telegram.error import BadRequest
+
+CAPTION_LIMIT = 1024
+ALBUM_LIMIT = 10
+
+
+def fit_caption(caption, limit=CAPTION_LIMIT):
+    """Shorten a caption to Telegram's photo caption limit.
+
+    Whole paragraphs (or lines) are dropped from the end, so the title,
+    artist and year stay and Markdown is not broken in the middle.
+    """
+    if len(caption) <= limit:
+        return caption
+
+    cut = caption.rfind('\n\n', 0, limit)
+    if cut <= 0:
+        cut = caption.rfind('\n', 0, limit)
+    if cut <= 0:
+        return caption[:limit - 1] + '…'
+    return caption[:cut].rstrip()
+
+
+async def send_artwork_album(message, items, file_cache=None, image_proxy=None):
+    """Send artworks as one media group (album) instead of one photo per call.
+
+    `items` is a list of (artwork, caption). Captions longer than the
+    1024-char photo caption limit are shortened (see fit_caption). With a
+    `file_cache` (ArtworkCache), images Telegram already has are sent by
+    file_id and new file_ids are remembered. With an `image_proxy`, other
+    images are uploaded as downsized JPEG bytes instead of the Met URL.
+    Returns the list of sent photo messages (in the order of `items`).
+    """
+    items = [(artwork, caption) for artwork, caption in items if artwork.get('image_url')]
+    photo_messages = []
+
+    for start in range(0, len(items), ALBUM_LIMIT):
+        chunk = items[start:start + ALBUM_LIMIT]
+        sources = await asyncio.gather(*(_photo_source(artwork, file_cache, image_proxy) for artwork, _ in chunk))
+        media = []
+        for (artwork, caption), source in zip(chunk, sources):
+            media.append(InputMediaPhoto(media=source, caption=fit_caption(caption), parse_mode='Markdown'))
+
+        try:
+            if len(media) == 1:
+                sent = [await message.reply_photo(
+                    photo=media[0].media, caption=media[0].caption, parse_mode='Markdown'
+                )]
+            else:
+                sent = list(await message.reply_media_group(media=media))
+            _remember_file_ids(chunk, sent, file_cache)
+            photo_messages.extend(sent)
+        except BadRequest as e:
+            # One bad image makes Telegram reject the whole album: send the rest one by one
+            print(f"Error sending album: {e}")
+            photo_messages.extend(await _send_one_by_one(message, chunk, media, file_cache))
+        except Exception as e:
+            # A timeout or network error may come after the album was posted: don't send it twice
+            print(f"Error sending album: {e}")
+
+    return photo_messages
+
+
+async def _photo_source(artwork, file_cache, image_proxy):
+    """Cached Telegram file_id, else downsized image bytes, else the Met image URL"""
+    if file_cache is not None:
+        file_id = file_cache.get_file_id(artwork.get('object_id'))
+        if file_id:
+            return file_id
+    if image_proxy is not None:
+        data = await image_proxy.get_photo(artwork)
+        if data:
+            return data
+    return artwork['image_url']
+
+
+def _remember_file_ids(chunk, sent, file_cache):
+    if file_cache is None:
+        return
+    for (artwork, _), photo_message in zip(chunk, sent):
+        if getattr(photo_message, 'photo', None):
+            file_cache.put_file_id(artwork.get('object_id'), photo_message.photo[-1].file_id)
+
+
+async def _send_one_by_one(message, chunk, media, file_cache):
+    sent = []
+    for (artwork, _), item in zip(chunk, media):
+        sources = [item.media]
+        if item.media != artwork['image_url']:
+            sources.append(artwork['image_url'])  # stale file_id or rejected upload: retry with the URL
+
+        for source in sources:
+            try:
+                photo_message = await message.reply_photo(photo=source, caption=item.caption, parse_mode='Markdown')
+                _remember_file_ids([(artwork, None)], [photo_message], file_cache)
+                sent.append(photo_message)
+                break
+            except BadRequest as e:
+                print(f"Error sending artwork: {e}")
+            except Exception as e:
+                print(f"Error sending artwork: {e}")
+                break  # may have been posted: no retry
+    return sent
@@ -0,0 +1,228 @@
+import re
+from collections import OrderedDict
+
+from dates import artwork_period
+
+# Localized texts for artwork descriptions. Everything here is turned into
+# lookup tables once, at import time; rendering a description is then a few
+# dict lookups and one regex search, and finished descriptions/captions are
+# memoized per (objectID, language).
+
+LANGUAGES = ('en', 'ru', 'de')
+
+# Phrases of the "Historical Context" paragraph
+SENTENCES = {
+    'culture': {
+        'en': "This masterpiece originates from {culture} culture. ",
+        'ru': "Этот шедевр происходит из культуры {culture}. ",
+        'de': "Dieses Meisterwerk stammt aus der {culture} Kultur. ",
+    },
+    'created_by': {
+        'en': "Created by {artist}",
+        'ru': "Создано {artist}",
+        'de': "Geschaffen von {artist}",
+    },
+    'created_in': {
+        'en': " in {date}",
+        'ru': " в {date}",
+        'de': " im Jahr {date}",
+    },
+    'artist_fallback': {
+        'en': "{artist} was a significant artist who contributed to art history.",
+        'ru': "{artist} был значимым художником, внёсшим вклад в историю искусства.",
+        'de': "{artist} war ein bedeutender Künstler, der zur Kunstgeschichte beitrug.",
+    },
+    'period_fallback': {
+        'en': "This work belongs to the {period} period.",
+        'ru': "Это произведение принадлежит к периоду {period}.",
+        'de': "Dieses Werk gehört zur Periode {period}.",
+    },
+    'style_fallback': {
+        'en': "distinctive artistic vision",
+        'ru': "уникальное художественное видение",
+        'de': "einzigartige künstlerische Vision",
+    },
+}
+
+# Artist key (matched anywhere in the lower-cased artist name) -> biography and style
+ARTISTS = {
+    'van gogh': {
+        'bio': {
+            'en': "Vincent van Gogh (1853-1890) was a Dutch Post-Impressionist painter whose work profoundly influenced 20th-century art. Known for bold colors and emotional honesty.",
+            'ru': "Винсент ван Гог (1853-1890) был голландским постимпрессионистом, чьи работы глубоко повлияли на искусство XX века. Известен яркими цветами и эмоциональной честностью.",
+            'de': "Vincent van Gogh (1853-1890) war ein niederländischer postimpressionistischer Maler, dessen Werk die Kunst des 20. Jahrhunderts tiefgreifend beeinflusste. Bekannt für kräftige Farben und emotionale Ehrlichkeit.",
+        },
+        'style': {
+            'en': "bold brushstrokes and vibrant colors",
+            'ru': "смелые мазки и яркие цвета",
+            'de': "kühne Pinselstriche und lebendige Farben",
+        },
+    },
+    'monet': {
+        'bio': {
+            'en': "Claude Monet (1840-1926) was a founder of French Impressionism. Famous for his series paintings capturing light and atmosphere.",
+            'ru': "Клод Моне (1840-1926) был основателем французского импрессионизма. Знаменит серийными картинами, запечатлевающими свет и атмосферу.",
+            'de': "Claude Monet (1840-1926) war ein Begründer des französischen Impressionismus. Berühmt für seine Serienbilder, die Licht und Atmosphäre einfangen.",
+        },
+        'style': {
+            'en': "impressionist light effects",
+            'ru': "импрессионистские световые эффекты",
+            'de': "impressionistische Lichteffekte",
+        },
+    },
+    'rembrandt': {
+        'bio': {
+            'en': "Rembrandt van Rijn (1606-1669) was a Dutch Golden Age painter, master of light and shadow (chiaroscuro).",
+            'ru': "Рембрандт ван Рейн (1606-1669) был художником Золотого века Нидерландов, мастером света и тени (кьяроскуро).",
+            'de': "Rembrandt van Rijn (1606-1669) war ein niederländischer Maler des Goldenen Zeitalters, Meister von Licht und Schatten (Chiaroscuro).",
+        },
+    },
+    'leonardo': {
+        'bio': {
+            'en': "Leonardo da Vinci (1452-1519) was an Italian Renaissance polymath - painter, inventor, scientist.",
+            'ru': "Леонардо да Винчи (1452-1519) был итальянским универсалом эпохи Возрождения - художником, изобретателем, учёным.",
+            'de': "Leonardo da Vinci (1452-1519) war ein italienischer Renaissance-Universalgelehrter - Maler, Erfinder, Wissenschaftler.",
+        },
+    },
+    'picasso': {
+        'bio': {
+            'en': "Pablo Picasso (1881-1973) was a Spanish painter and co-founder of Cubism.",
+            'ru': "Пабло Пикассо (1881-1973) был испанским художником и соосно вателем кубизма.",
+            'de': "Pablo Picasso (1881-1973) war ein spanischer Maler und Mitbegründer des Kubismus.",
+        },
+    },
+}
+
+PERIODS = {
+    'Renaissance': {
+        'en': "The Renaissance (14th-17th century) marked a cultural rebirth emphasizing humanism, realism, and classical inspiration.",
+        'ru': "Ренессанс (14-17 века) ознаменовал культурное возрождение с акцентом на гуманизм, реализм и классическое вдохновение.",
+        'de': "Die Renaissance (14.-17. Jahrhundert) markierte eine kulturelle Wiedergeburt mit Betonung auf Humanismus, Realismus und klassischer Inspiration.",
+    },
+    'Baroque': {
+        'en': "The Baroque period (1600-1750) featured dramatic expression, rich colors, and intense light and shadow contrasts.",
+        'ru': "Период барокко (1600-1750) характеризовался драматическим выражением, насыщенными цветами и интенсивными контрастами света и тени.",
+        'de': "Die Barockzeit (1600-1750) zeichnete sich durch dramatischen Ausdruck, reiche Farben und intensive Hell-Dunkel-Kontraste aus.",
+    },
+    'Impressionism': {
+        'en': "Impressionism (1860-1890) revolutionized art with visible brushstrokes and emphasis on light effects.",
+        'ru': "Импрессионизм (1860-1890) революционизировал искусство видимыми мазками кисти и акцентом на световых эффектах.",
+        'de': "Der Impressionismus (1860-1890) revolutionierte die Kunst mit sichtbaren Pinselstrichen und Betonung auf Lichteffekten.",
+    },
+}
+
+# TEXTS keys used as headings and labels
+LABEL_KEYS = ('historical_context', 'about_artist', 'artistic_period', 'technical_details',
+              'medium', 'department', 'style', 'artist_name', 'year', 'museum')
+
+# One alternation over all artist keys: a single scan of the name finds the artist
+ARTIST_PATTERN = re.compile('|'.join(re.escape(key) for key in ARTISTS))
+
+
+def match_artist(artist):
+    """Key of ARTISTS mentioned in the artist name, or None"""
+    match = ARTIST_PATTERN.search(artist.lower())
+    return match.group(0) if match else None
+
+
+class DescriptionRenderer:
+    """Renders artwork descriptions and photo captions from the tables above.
+
+    texts is bot_ai.TEXTS, used for headings and labels. Results are kept in
+    an LRU keyed by (objectID, language); artworks without an objectID are
+    rendered every time.
+    """
+
+    def __init__(self, texts, cache_size=5000):
+        self.cache_size = cache_size
+        self._descriptions = OrderedDict()
+        self._captions = OrderedDict()
+
+        # language -> {name: text}, with English as the fallback language
+        self._tables = {}
+        for lang in set(texts) | set(LANGUAGES):
+            table = {key: texts.get(lang, texts['en']).get(key, texts['en'].get(key, '')) for key in LABEL_KEYS}
+            for name, versions in SENTENCES.items():
+                table[name] = versions.get(lang, versions['en'])
+            table['bios'] = {key: info['bio'].get(lang, info['bio']['en']) for key, info in ARTISTS.items()}
+            table['styles'] = {key: info['style'].get(lang, info['style']['en'])
+                               for key, info in ARTISTS.items() if 'style' in info}
+            table['periods'] = {period: versions.get(lang, versions['en']) for period, versions in PERIODS.items()}
+            self._tables[lang] = table
+
+    def _table(self, lang):
+        return self._tables.get(lang) or self._tables['en']
+
+    def description(self, artwork, lang):
+        """Detailed description in the user's language"""
+        return self._memoized(self._descriptions, artwork, lang, lambda: self._render_description(artwork, lang))
+
+    def caption(self, artwork, lang, with_museum=True):
+        """Photo caption: title, artist, year and the detailed description"""
+        return self._memoized(self._captions, artwork, (lang, with_museum),
+                              lambda: self._render_caption(artwork, lang, with_museum))
+
+    def _memoized(self, cache, artwork, variant, render):
+        object_id = artwork.get('object_id')
+        if object_id is None:
+            return render()
+        key = (object_id, variant)
+        text = cache.get(key)
+        if text is not None:
+            cache.move_to_end(key)
+            return text
+        text = render()
+        cache[key] = text
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return text
+
+    def _render_caption(self, artwork, lang, with_museum):
+        table = self._table(lang)
+        museum_line = f"🏛️ **{table['museum']}:** Metropolitan Museum of Art\n" if with_museum else ""
+        return f"""🗽 **{artwork['title']}**
+
+👨‍🎨 **{table['artist_name']}:** {artwork['artist']}
+📅 **{table['year']}:** {artwork.get('date', 'Unknown')}
+{museum_line}
+{self.description(artwork, lang)}"""
+
+    def _render_description(self, artwork, lang):
+        table = self._table(lang)
+        artist = artwork.get('artist', 'Unknown Artist')
+        date = artwork.get('date', 'Unknown period')
+        culture = artwork.get('culture', '')
+        department = artwork.get('department', '')
+        medium = artwork.get('medium', '')
+        artist_key = match_artist(artist)
+        period = artwork_period(artwork)
+
+        # Historical Context
+        parts = [table['historical_context'], "\n"]
+        if culture:
+            parts.append(table['culture'].format(culture=culture))
+        parts.append(table['created_by'].format(artist=artist))
+        if date and date != 'Unknown':
+            parts.append(table['created_in'].format(date=date))
+        parts.append(".\n\n")
+
+        # Artist Information
+        bio = table['bios'].get(artist_key) or table['artist_fallback'].format(artist=artist)
+        parts += [table['about_artist'], "\n", bio, "\n\n"]
+
+        # Period Information
+        if period:
+            info = table['periods'].get(period) or table['period_fallback'].format(period=period)
+            parts += [table['artistic_period'], "\n", info, "\n\n"]
+
+        # Technical Details
+        parts += [table['technical_details'], "\n"]
+        if medium:
+            parts.append(f"{table['medium']}: {medium}\n")
+        if department:
+            parts.append(f"{table['department']}: {department}\n")
+
+        style = table['styles'].get(artist_key, table['style_fallback'])
+        parts.append(f"{table['style']}: {style}\n")
+
+        return ''.join(parts)
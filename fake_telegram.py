@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections import defaultdict
+
+import httpx
+import tornado.web
+
+# Local stand-in for the Telegram Bot API, to try webhook.py without Telegram:
+#
+#   python fake_telegram.py --chats 50 --messages 5
+#   TELEGRAM_TOKEN=123:fake WEBHOOK_URL=http://127.0.0.1:8443 \
+#   TELEGRAM_API_BASE_URL=http://127.0.0.1:8081/bot python webhook.py
+#
+# The fake API answers every Bot API call the bot makes, learns the webhook
+# URL from setWebhook and then posts fake user messages to it: chats in
+# parallel, messages of one chat one after another.
+
+STATE = {
+    'webhook_url': None,
+    'secret': None,
+    'calls': defaultdict(int),
+    'replies': defaultdict(list),  # chat_id -> [(time, method)]
+}
+message_ids = itertools.count(1)
+
+
+def fake_message(chat_id, photo=False, text=None):
+    message = {
+        'message_id': next(message_ids),
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private'},
+    }
+    if photo:
+        file_id = f"fake-file-{message['message_id']}"
+        message['photo'] = [{'file_id': file_id, 'file_unique_id': file_id, 'width': 800, 'height': 600}]
+    else:
+        message['text'] = text or 'ok'
+    return message
+
+
+class BotApiHandler(tornado.web.RequestHandler):
+    def check_xsrf_cookie(self):
+        pass
+
+    def param(self, name):
+        values = self.request.body_arguments.get(name)
+        if values:
+            return values[0].decode()
+        if self.request.headers.get('Content-Type', '').startswith('application/json'):
+            return json.loads(self.request.body or b'{}').get(name)
+        return None
+
+    def post(self, token, method):
+        STATE['calls'][method] += 1
+        chat_id = self.param('chat_id')
+        chat_id = int(chat_id) if chat_id else 0
+
+        if method == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'Fake Bot', 'username': 'fake_bot'}
+        elif method == 'setWebhook':
+            STATE['webhook_url'] = self.param('url')
+            STATE['secret'] = self.param('secret_token')
+            result = True
+        elif method == 'sendMediaGroup':
+            media = json.loads(self.param('media') or '[]')
+            result = [fake_message(chat_id, photo=True) for _ in media]
+        elif method in ('sendPhoto', 'sendMessage', 'editMessageText'):
+            result = fake_message(chat_id, photo=(method == 'sendPhoto'))
+        else:
+            result = True
+
+        if method.startswith('send'):
+            STATE['replies'][chat_id].append((time.monotonic(), method))
+
+        self.write({'ok': True, 'result': result})
+
+    get = post
+
+
+def fake_update(update_id, chat_id, text):
+    user = {'id': chat_id, 'is_bot': False, 'first_name': f'User {chat_id}'}
+    message = {
+        'message_id': update_id,
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private'},
+        'from': user,
+        'text': text,
+    }
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return {'update_id': update_id, 'message': message}
+
+
+async def send_updates(chats, messages, text):
+    """Post fake updates: chats in parallel, one chat's messages in order"""
+    update_ids = itertools.count(1)
+    headers = {}
+    if STATE['secret']:
+        headers['X-Telegram-Bot-Api-Secret-Token'] = STATE['secret']
+
+    async with httpx.AsyncClient(timeout=30) as client:
+        async def chat_session(chat_id):
+            for _ in range(messages):
+                response = await client.post(STATE['webhook_url'], json=fake_update(next(update_ids), chat_id, text),
+                                             headers=headers)
+                response.raise_for_status()
+
+        started = time.monotonic()
+        await asyncio.gather(*(chat_session(1000 + i) for i in range(chats)))
+        return started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Fake Telegram Bot API + update sender for webhook.py")
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--chats', type=int, default=20)
+    parser.add_argument('--messages', type=int, default=3)
+    parser.add_argument('--text', default='/help')
+    parser.add_argument('--wait', type=float, default=10.0, help="seconds to wait for replies")
+    args = parser.parse_args()
+
+    app = tornado.web.Application([(r"/bot([^/]+)/(\w+)", BotApiHandler)])
+    app.listen(args.port, address='127.0.0.1')
+    print(f"🧪 Fake Bot API on http://127.0.0.1:{args.port}/bot — waiting for setWebhook...")
+
+    while STATE['webhook_url'] is None:
+        await asyncio.sleep(0.2)
+    print(f"🔗 Webhook: {STATE['webhook_url']}")
+
+    started = await send_updates(args.chats, args.messages, args.text)
+    expected = args.chats * args.messages
+
+    deadline = time.monotonic() + args.wait
+    while time.monotonic() < deadline:
+        if sum(len(r) for r in STATE['replies'].values()) >= expected:
+            break
+        await asyncio.sleep(0.1)
+
+    replies = [t for chat in STATE['replies'].values() for t, _ in chat]
+    print(f"📨 Sent {expected} updates to {args.chats} chats")
+    print(f"📬 Got {len(replies)} replies in {(max(replies, default=started) - started):.2f}s")
+    print(f"📊 API calls: {dict(STATE['calls'])}")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional: without it the bot sends Met URLs
+    Image = None
+
+
+class ImageProxy:
+    """Downloads artwork images and shrinks them to Telegram-friendly JPEGs.
+
+    Met primaryImage files are often many megabytes. The proxy prefers the
+    primaryImageSmall rendition when it is large enough, otherwise streams the
+    original, resizes and recompresses it in a thread pool, and keeps the
+    result on disk under a size-bounded LRU. get_photo() returns JPEG bytes,
+    or None when the image could not be prepared (the caller then falls back
+    to the URL).
+    """
+
+    def __init__(self, cache_dir="image_cache", max_cache_bytes=500 * 1024 * 1024,
+                 max_side=1600, min_side=800, max_photo_bytes=2 * 1024 * 1024,
+                 max_download_bytes=60 * 1024 * 1024, workers=None, timeout=30.0):
+        self.cache_dir = cache_dir
+        self.max_cache_bytes = max_cache_bytes
+        self.max_side = max_side
+        # primaryImageSmall is used when its longer side is at least this
+        self.min_side = min_side
+        self.max_photo_bytes = max_photo_bytes
+        self.max_download_bytes = max_download_bytes
+        self.timeout = timeout
+        self.enabled = Image is not None
+        self.stats = {'cache_hits': 0, 'small_used': 0, 'original_used': 0, 'failures': 0}
+
+        self._executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 2)
+        self._client = None
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        # file name -> size, oldest (least recently used) first
+        entries = []
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            if name.endswith('.jpg') and os.path.isfile(path):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name, stat.st_size))
+        self._files = {name: size for _, name, size in sorted(entries)}
+        self._cache_bytes = sum(self._files.values())
+
+    def _get_client(self):
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True)
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._executor.shutdown(wait=False)
+
+    async def get_photo(self, artwork):
+        """JPEG bytes for the artwork image, or None"""
+        if not self.enabled or not artwork.get('image_url'):
+            return None
+
+        name = self._cache_name(artwork)
+        data = await asyncio.to_thread(self._read_cached, name)
+        if data is not None:
+            self.stats['cache_hits'] += 1
+            return data
+
+        # Several users asking for the same artwork share one download
+        task = self._in_flight.get(name)
+        if task is None:
+            task = asyncio.ensure_future(self._prepare(artwork, name))
+            self._in_flight[name] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(name, None))
+        return await asyncio.shield(task)
+
+    async def _prepare(self, artwork, name):
+        loop = asyncio.get_running_loop()
+        try:
+            data = None
+            small_url = artwork.get('image_url_small')
+            if small_url and small_url != artwork['image_url']:
+                try:
+                    raw = await self._download(small_url)
+                    data = await loop.run_in_executor(self._executor, self._shrink, raw, self.min_side)
+                except Exception as e:
+                    print(f"Image proxy error for {small_url}, trying the original: {e}")
+                if data is not None:
+                    self.stats['small_used'] += 1
+
+            if data is None:
+                raw = await self._download(artwork['image_url'])
+                data = await loop.run_in_executor(self._executor, self._shrink, raw, 0)
+                self.stats['original_used'] += 1
+
+            if data is None:
+                self.stats['failures'] += 1
+                return None
+
+            await asyncio.to_thread(self._write_cached, name, data)
+            return data
+
+        except Exception as e:
+            print(f"Image proxy error for {artwork.get('image_url')}: {e}")
+            self.stats['failures'] += 1
+            return None
+
+    async def _download(self, url):
+        """Stream an image, refusing files larger than max_download_bytes"""
+        chunks = []
+        size = 0
+        async with self._get_client().stream("GET", url) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+                if size > self.max_download_bytes:
+                    raise ValueError(f"image larger than {self.max_download_bytes} bytes")
+                chunks.append(chunk)
+        return b''.join(chunks)
+
+    def _shrink(self, raw, min_side):
+        """Resize/recompress to JPEG within Telegram photo limits (runs in the pool).
+
+        Returns None if the image's longer side is below min_side.
+        """
+        with Image.open(io.BytesIO(raw)) as image:
+            if max(image.size) < min_side:
+                return None
+
+            image = image.convert('RGB')
+            image.thumbnail((self.max_side, self.max_side))
+
+            quality = 85
+            while True:
+                buffer = io.BytesIO()
+                image.save(buffer, format='JPEG', quality=quality, optimize=True)
+                if buffer.tell() <= self.max_photo_bytes or quality <= 40:
+                    return buffer.getvalue()
+                quality -= 15
+
+    @staticmethod
+    def _cache_name(artwork):
+        if artwork.get('object_id'):
+            return f"{artwork['object_id']}.jpg"
+        return hashlib.sha1(artwork['image_url'].encode()).hexdigest() + '.jpg'
+
+    def _read_cached(self, name):
+        with self._lock:
+            if name not in self._files:
+                return None
+            path = os.path.join(self.cache_dir, name)
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                os.utime(path)
+            except OSError:
+                self._cache_bytes -= self._files.pop(name)
+                return None
+            self._files[name] = self._files.pop(name)  # mark as recently used
+            return data
+
+    def _write_cached(self, name, data):
+        with self._lock:
+            path = os.path.join(self.cache_dir, name)
+            with open(path, 'wb') as f:
+                f.write(data)
+            self._cache_bytes += len(data) - self._files.pop(name, 0)
+            self._files[name] = len(data)
+
+            while self._cache_bytes > self.max_cache_bytes and len(self._files) > 1:
+                oldest = next(iter(self._files))
+                self._cache_bytes -= self._files.pop(oldest)
+                try:
+                    os.remove(os.path.join(self.cache_dir, oldest))
+                except OSError:
+                    pass
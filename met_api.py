@@ -1,11 +1,19 @@
 
 
-import requests
+import asyncio
 import random
+import time
+from collections import OrderedDict
+
+import httpx
+import requests
+
+from resilience import CircuitOpenError, HedgingPolicy, ResiliencePolicy
 
 class MetMuseumAPI:
     def __init__(self):
         self.base_url = "https://collectionapi.metmuseum.org/public/collection/v1"
+        self.timeout = (5, 15)  # connect, read (seconds)
     
     def search_artworks(self, query, max_results=5):
         """Search artworks by query"""
@@ -14,7 +22,7 @@ class MetMuseumAPI:
             search_url = f"{self.base_url}/search"
             params = {'q': query, 'hasImages': 'true'}
             
-            response = requests.get(search_url, params=params)
+            response = requests.get(search_url, params=params, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
             
@@ -47,7 +55,7 @@ class MetMuseumAPI:
             search_url = f"{self.base_url}/search"
             params = {'q': 'art', 'hasImages': 'true'}
             
-            response = requests.get(search_url, params=params)
+            response = requests.get(search_url, params=params, timeout=self.timeout)
             response.raise_for_status()
             data = response.json()
             
@@ -68,7 +76,7 @@ class MetMuseumAPI:
         """Get details for specific object"""
         try:
             object_url = f"{self.base_url}/objects/{object_id}"
-            response = requests.get(object_url)
+            response = requests.get(object_url, timeout=self.timeout)
             response.raise_for_status()
             obj = response.json()
             
@@ -86,4 +94,363 @@ class MetMuseumAPI:
             
         except Exception as e:
             print(f"Error getting object {object_id}: {e}")
-            return None
\ No newline at end of file
+            return None
+
+class AsyncMetMuseumAPI:
+    """Non-blocking Met Museum client for the bot handlers.
+
+    All requests go through one shared httpx.AsyncClient (connection pool with
+    keep-alive), and a semaphore caps how many requests are in flight at once,
+    so a slow Met response only delays the user who is waiting for it.
+    Requests pass through a ResiliencePolicy (rate limit, retries, circuit
+    breaker); while the Met is failing, cached searches and objects are
+    served even when they are past their TTL.
+    """
+
+    def __init__(self, max_connections=20, max_concurrency=10, timeout=15.0, connect_timeout=5.0,
+                 fanout_concurrency=5, max_scan_factor=5, cache=None, mirror=None, shared_cache=None,
+                 search_fresh_ttl=3600, search_stale_ttl=24 * 3600, search_cache_size=500,
+                 rate_limit=40.0, resilience=None, hedging=None):
+        self.base_url = "https://collectionapi.metmuseum.org/public/collection/v1"
+        # Optional ArtworkCache for object details
+        self.cache = cache
+        # Optional MetMirror (local snapshot), tried before the network
+        self.mirror = mirror
+        # Optional shared_state.StateBackend, so other worker processes reuse our searches
+        self.shared_cache = shared_cache
+        self.max_connections = max_connections
+        # Detail lookups started at once for one search
+        self.fanout_concurrency = fanout_concurrency
+        # How many IDs per wanted result we are willing to try before giving up
+        self.max_scan_factor = max_scan_factor
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        # Met asks clients to stay under 80 requests per second
+        self.resilience = resilience or ResiliencePolicy(rate=rate_limit)
+        # Optional HedgingPolicy for /objects lookups (True for the defaults)
+        self.hedging = HedgingPolicy() if hedging is True else hedging or None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = None
+
+        # Search results (objectID lists) per normalized query: served fresh for
+        # search_fresh_ttl, then served stale and refreshed in the background
+        # until search_stale_ttl.
+        self.search_fresh_ttl = search_fresh_ttl
+        self.search_stale_ttl = search_stale_ttl
+        self.search_cache_size = search_cache_size
+        self.search_stats = {'fresh_hits': 0, 'stale_hits': 0, 'misses': 0, 'deduplicated': 0, 'fallback_hits': 0}
+        self._search_cache = OrderedDict()
+        self._search_in_flight = {}
+        self._background_tasks = set()
+
+    def _get_client(self):
+        """Create the pooled HTTP client on first use (inside the running loop)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+        return self._client
+
+    async def close(self):
+        """Close the pooled HTTP client"""
+        for task in list(self._background_tasks):
+            task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get_json(self, path, params=None, on_latency=None):
+        """GET a Met endpoint and return the decoded JSON.
+
+        on_latency(seconds) gets the time of each HTTP call, without the wait
+        for the semaphore and the rate limiter.
+        """
+        async def send():
+            async with self._semaphore:
+                started = time.monotonic()
+                response = await self._get_client().get(path, params=params)
+                if on_latency is not None:
+                    on_latency(time.monotonic() - started)
+                return response
+
+        response = await self.resilience.call(send)
+        response.raise_for_status()
+        return response.json()
+
+    async def search_artworks(self, query, max_results=5):
+        """Search artworks by query"""
+        if self.mirror is not None:
+            artworks = self.mirror.search(query, max_results)
+            if artworks:
+                return artworks
+
+        try:
+            object_ids = await self._search_ids(query)
+
+            if not object_ids:
+                return []
+
+            return await self._fetch_details_in_order(object_ids, max_results)
+
+        except Exception as e:
+            print(f"API Error: {e}")
+            return []
+
+    async def search_ids(self, query):
+        """The whole objectID list behind search_artworks(query), best first (for paging)"""
+        if self.mirror is not None:
+            object_ids = self.mirror.search_ids(query)
+            if object_ids:
+                return object_ids
+
+        try:
+            return await self._search_ids(query)
+        except Exception as e:
+            print(f"API Error: {e}")
+            return []
+
+    async def search_first_available(self, queries, max_results=5):
+        """Run several candidate searches at once and return the best one.
+
+        `queries` are ordered by priority. Returns (query, artworks) for the
+        first query with results; lower-priority searches are cancelled as soon
+        as a higher-priority one succeeds. Returns (None, []) if all are empty.
+        """
+        queries = list(dict.fromkeys(q for q in queries if q))
+        tasks = [asyncio.ensure_future(self.search_artworks(q, max_results)) for q in queries]
+
+        try:
+            pending = set(tasks)
+            while pending:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for query, task in zip(queries, tasks):
+                    if not task.done():
+                        break  # a higher-priority search is still running
+                    if task.result():
+                        return query, task.result()
+            return None, []
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _search_ids(self, query, has_images=True):
+        """Return the objectID list for a query, using the search cache"""
+        key = (' '.join(query.lower().split()), has_images)
+        entry = self._search_cache.get(key)
+        if entry is None and self.shared_cache is not None:
+            entry = await self._load_shared_search(key)
+
+        if entry is not None:
+            fetched_at, object_ids = entry
+            age = time.monotonic() - fetched_at
+            if age < self.search_fresh_ttl:
+                self._search_cache.move_to_end(key)
+                self.search_stats['fresh_hits'] += 1
+                return object_ids
+            if age < self.search_stale_ttl:
+                self._search_cache.move_to_end(key)
+                self.search_stats['stale_hits'] += 1
+                self._refresh_in_background(key)
+                return object_ids
+
+        self.search_stats['misses'] += 1
+        try:
+            return await self._fetch_search_ids(key)
+        except Exception:
+            if entry is None:
+                raise
+            # Upstream unhealthy: an old answer beats no answer
+            self.search_stats['fallback_hits'] += 1
+            return entry[1]
+
+    async def _fetch_search_ids(self, key):
+        """Run one /search per key; concurrent callers share the same request"""
+        task = self._search_in_flight.get(key)
+        if task is not None:
+            self.search_stats['deduplicated'] += 1
+        else:
+            task = asyncio.ensure_future(self._request_search_ids(key))
+            self._search_in_flight[key] = task
+            task.add_done_callback(lambda _: self._search_in_flight.pop(key, None))
+
+        # shield: one caller giving up must not cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _request_search_ids(self, key):
+        """Query /search and store the objectID list in the search cache"""
+        query, has_images = key
+        params = {'q': query}
+        if has_images:
+            params['hasImages'] = 'true'
+
+        data = await self._get_json("/search", params=params)
+        object_ids = data.get('objectIDs') or []
+
+        self._remember_search(key, time.monotonic(), object_ids)
+        if self.shared_cache is not None:
+            # A backend call may block (SQLite busy timeout): keep it off the event loop
+            await asyncio.to_thread(self.shared_cache.cache_set, self._shared_search_key(key),
+                                    {'ids': object_ids, 'fetched_at': time.time()})
+
+        return object_ids
+
+    def _remember_search(self, key, fetched_at, object_ids):
+        self._search_cache[key] = (fetched_at, object_ids)
+        self._search_cache.move_to_end(key)
+        while len(self._search_cache) > self.search_cache_size:
+            self._search_cache.popitem(last=False)
+
+    @staticmethod
+    def _shared_search_key(key):
+        return f"search:{int(key[1])}:{key[0]}"
+
+    async def _load_shared_search(self, key):
+        """Take a search result another worker already stored in the shared cache"""
+        value = await asyncio.to_thread(self.shared_cache.cache_get, self._shared_search_key(key),
+                                        self.search_stale_ttl)
+        if value is None:
+            return None
+        age = time.time() - value['fetched_at']
+        self._remember_search(key, time.monotonic() - age, value['ids'])
+        return self._search_cache[key]
+
+    def _refresh_in_background(self, key):
+        """Revalidate a stale search entry without making the caller wait"""
+        if key in self._search_in_flight:
+            return
+
+        async def refresh():
+            try:
+                await self._fetch_search_ids(key)
+            except Exception as e:
+                print(f"Search refresh error for '{key[0]}': {e}")
+
+        task = asyncio.ensure_future(refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _fetch_details_in_order(self, object_ids, max_results):
+        """Fetch details concurrently, keeping the relevance order of object_ids.
+
+        Up to fanout_concurrency lookups run at once. When an object comes back
+        without an image the next ID is started straight away, so the caller
+        still gets max_results artworks in about one round-trip.
+        """
+        candidates = object_ids[:max_results * self.max_scan_factor]
+        results = {}
+        in_flight = {}
+        next_idx = 0
+        found = 0
+
+        try:
+            while True:
+                while (next_idx < len(candidates)
+                       and len(in_flight) < self.fanout_concurrency
+                       and found + len(in_flight) < max_results):
+                    task = asyncio.ensure_future(self._get_object_details(candidates[next_idx]))
+                    in_flight[task] = next_idx
+                    next_idx += 1
+
+                if not in_flight:
+                    break
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    idx = in_flight.pop(task)
+                    artwork_data = task.result()
+                    if artwork_data:
+                        results[idx] = artwork_data
+                        found += 1
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+        return [results[idx] for idx in sorted(results)]
+
+    async def get_artworks(self, object_ids, max_results=5):
+        """Artworks with an image among object_ids, in the given order"""
+        return await self._fetch_details_in_order(list(object_ids), max_results)
+
+    async def search_by_artist(self, artist_name, max_results=5):
+        """Search by artist name"""
+        return await self.search_artworks(artist_name, max_results)
+
+    async def get_random_artwork(self):
+        """Get random artwork"""
+        artworks = await self.get_random_artworks(1)
+        return artworks[0] if artworks else None
+
+    async def get_random_artworks(self, count, query='art'):
+        """Get `count` artworks drawn uniformly from the whole ID list of a query.
+
+        IDs whose object has no image are replaced by further draws.
+        """
+        try:
+            object_ids = await self._search_ids(query)
+
+            if not object_ids:
+                return []
+
+            draw = random.sample(object_ids, min(len(object_ids), count * self.max_scan_factor))
+            return await self._fetch_details_in_order(draw, count)
+
+        except Exception as e:
+            print(f"API Error: {e}")
+            return []
+
+    async def _get_object_details(self, object_id):
+        """Get details for specific object (served from the cache when possible)"""
+        if self.cache is not None:
+            found, artwork = self.cache.get(object_id)
+            if found:
+                return artwork
+
+        if self.mirror is not None:
+            found, artwork = self.mirror.get(object_id)
+            if found:
+                return artwork
+
+        try:
+            path = f"/objects/{object_id}"
+            if self.hedging is not None:
+                obj = await self.hedging.run(lambda: self._get_json(path, on_latency=self.hedging.record),
+                                             can_hedge=lambda: not self._semaphore.locked())
+            else:
+                obj = await self._get_json(path)
+            artwork = self._normalize_object(obj) if obj.get('primaryImage') else None
+
+            if self.cache is not None:
+                self.cache.put(object_id, artwork)
+
+            return artwork
+
+        except Exception as e:
+            if self.cache is not None:
+                found, artwork = self.cache.get(object_id, max_age=float('inf'))
+                if found:
+                    return artwork
+            if not isinstance(e, CircuitOpenError):
+                print(f"Error getting object {object_id}: {e}")
+            return None
+
+    @staticmethod
+    def _normalize_object(obj):
+        """Turn a raw /objects response into the artwork dict used by the bot"""
+        return {
+            'object_id': obj.get('objectID'),
+            'title': obj.get('title', 'Untitled'),
+            'artist': obj.get('artistDisplayName', 'Unknown Artist'),
+            'image_url': obj.get('primaryImage'),
+            'image_url_small': obj.get('primaryImageSmall', ''),
+            'date': obj.get('objectDate', 'Unknown'),
+            'begin_date': obj.get('objectBeginDate'),
+            'end_date': obj.get('objectEndDate'),
+            'culture': obj.get('culture', ''),
+            'department': obj.get('department', ''),
+            'medium': obj.get('medium', ''),
+        }
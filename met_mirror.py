@@ -0,0 +1,286 @@
+import argparse
+import asyncio
+import datetime
+import json
+import sqlite3
+import threading
+
+import httpx
+
+from met_api import AsyncMetMuseumAPI
+
+YEAR_FIELDS = ['begin_date', 'end_date']
+# Runs an object may fail in before it is skipped, so one bad object cannot hold up last_sync
+MAX_ATTEMPTS = 3
+FIELDS = ['title', 'artist', 'image_url', 'image_url_small', 'date', 'culture', 'department', 'medium'] + YEAR_FIELDS
+
+
+class MetMirror:
+    """Local SQLite snapshot of the Met collection with an FTS5 index.
+
+    Built by `python met_mirror.py ingest`. AsyncMetMuseumAPI answers searches
+    and object lookups from here first and only goes to the network when the
+    mirror has nothing.
+    """
+
+    def __init__(self, db_path="met_mirror.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS objects (
+                object_id INTEGER PRIMARY KEY,
+                title TEXT,
+                artist TEXT,
+                image_url TEXT,
+                image_url_small TEXT,
+                date TEXT,
+                culture TEXT,
+                department TEXT,
+                medium TEXT,
+                begin_date INTEGER,
+                end_date INTEGER,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS objects_fts USING fts5(
+                title, artist, culture, department, medium,
+                content='objects', content_rowid='object_id'
+            );
+            CREATE TRIGGER IF NOT EXISTS objects_ai AFTER INSERT ON objects BEGIN
+                INSERT INTO objects_fts(rowid, title, artist, culture, department, medium)
+                VALUES (new.object_id, new.title, new.artist, new.culture, new.department, new.medium);
+            END;
+            CREATE TRIGGER IF NOT EXISTS objects_ad AFTER DELETE ON objects BEGIN
+                INSERT INTO objects_fts(objects_fts, rowid, title, artist, culture, department, medium)
+                VALUES ('delete', old.object_id, old.title, old.artist, old.culture, old.department, old.medium);
+            END;
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        # Mirrors built before image_url_small / the numeric dates were stored
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(objects)")}
+        if 'image_url_small' not in columns:
+            self._conn.execute("ALTER TABLE objects ADD COLUMN image_url_small TEXT DEFAULT ''")
+        for field in YEAR_FIELDS:
+            if field not in columns:
+                self._conn.execute(f"ALTER TABLE objects ADD COLUMN {field} INTEGER")
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM objects").fetchone()[0]
+
+    @staticmethod
+    def _fts_query(query):
+        """Build an FTS5 query that matches all words of the user query"""
+        words = [w.replace('"', '') for w in query.split()]
+        return ' '.join(f'"{w}"' for w in words if w)
+
+    def search(self, query, max_results=5):
+        """Return artworks with an image that match the query, best matches first"""
+        fts_query = self._fts_query(query)
+        if not fts_query:
+            return []
+
+        with self._lock:
+            rows = self._conn.execute(f"""
+                SELECT o.object_id, {', '.join('o.' + f for f in FIELDS)}
+                FROM objects_fts JOIN objects o ON o.object_id = objects_fts.rowid
+                WHERE objects_fts MATCH ? AND o.image_url != ''
+                ORDER BY bm25(objects_fts)
+                LIMIT ?
+            """, (fts_query, max_results)).fetchall()
+
+        return [self._row_to_artwork(row) for row in rows]
+
+    def search_ids(self, query, limit=1000):
+        """objectIDs of the artworks search() would return, best matches first"""
+        fts_query = self._fts_query(query)
+        if not fts_query:
+            return []
+
+        with self._lock:
+            rows = self._conn.execute("""
+                SELECT o.object_id
+                FROM objects_fts JOIN objects o ON o.object_id = objects_fts.rowid
+                WHERE objects_fts MATCH ? AND o.image_url != ''
+                ORDER BY bm25(objects_fts)
+                LIMIT ?
+            """, (fts_query, limit)).fetchall()
+
+        return [row[0] for row in rows]
+
+    def get(self, object_id):
+        """Return (found, artwork) like ArtworkCache.get"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT object_id, {', '.join(FIELDS)} FROM objects WHERE object_id = ?",
+                (int(object_id),)
+            ).fetchone()
+
+        if row is None:
+            return False, None
+        artwork = self._row_to_artwork(row)
+        return True, artwork if artwork['image_url'] else None
+
+    @staticmethod
+    def _row_to_artwork(row):
+        return dict(zip(['object_id'] + FIELDS, row))
+
+    def known_ids(self):
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT object_id FROM objects")}
+
+    def upsert_many(self, artworks):
+        """Insert or replace normalized artwork records"""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM objects WHERE object_id = ?",
+                [(a['object_id'],) for a in artworks]
+            )
+            self._conn.executemany(
+                f"INSERT INTO objects (object_id, {', '.join(FIELDS)}) VALUES (?{', ?' * len(FIELDS)})",
+                [[a['object_id']] + [a.get(f) if f in YEAR_FIELDS else a.get(f) or '' for f in FIELDS]
+                 for a in artworks]
+            )
+            self._conn.commit()
+
+    def delete_many(self, object_ids):
+        with self._lock:
+            self._conn.executemany("DELETE FROM objects WHERE object_id = ?", [(i,) for i in object_ids])
+            self._conn.commit()
+
+    def get_state(self, key, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_state(self, key, value):
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, value))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+async def ingest(mirror, api, full=False, limit=None, batch_size=200):
+    """Fetch objects from the Met into the mirror.
+
+    The first run (or --full) walks every objectID and skips the ones already
+    stored, so an interrupted ingest can simply be restarted. Later runs ask
+    /objects?metadataDate= for objects changed since the last sync and only
+    fetch those.
+
+    last_sync only moves on when every object of a run was fetched. IDs that
+    failed or were cut off by `limit` are kept in sync_state and fetched
+    first by the next run. An ID that fails in MAX_ATTEMPTS runs is given up
+    on and listed in the skipped_ids state instead.
+    """
+    last_sync = None if full else mirror.get_state('last_sync')
+    pending = None if full else json.loads(mirror.get_state('pending_ids') or 'null')
+    attempts = json.loads(mirror.get_state('failed_attempts') or '{}')
+
+    if pending:
+        object_ids = pending
+        sync_date = mirror.get_state('pending_sync_date')
+        source = 'left over from the last run'
+    else:
+        sync_date = datetime.date.today().isoformat()
+        params = {'metadataDate': last_sync} if last_sync else None
+        data = await api._get_json("/objects", params=params)
+        object_ids = data.get('objectIDs') or []
+        source = 'since ' + last_sync if last_sync else 'full snapshot'
+
+        if not last_sync:
+            known = mirror.known_ids()
+            object_ids = [i for i in object_ids if i not in known]
+
+    left_over = object_ids[limit:] if limit else []
+    if limit:
+        object_ids = object_ids[:limit]
+
+    print(f"📥 {len(object_ids)} objects to fetch ({source})")
+
+    async def fetch(object_id):
+        try:
+            obj = await api._get_json(f"/objects/{object_id}")
+            return object_id, api._normalize_object(obj)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == 404:
+                return object_id, None
+            print(f"Error getting object {object_id}: {e}")
+        except Exception as e:
+            print(f"Error getting object {object_id}: {e}")
+        return object_id, False
+
+    done = 0
+    failed = []
+    for start in range(0, len(object_ids), batch_size):
+        results = await asyncio.gather(*(fetch(i) for i in object_ids[start:start + batch_size]))
+        mirror.upsert_many([artwork for _, artwork in results if artwork])
+        mirror.delete_many([object_id for object_id, artwork in results if artwork is None])
+        failed += [object_id for object_id, artwork in results if artwork is False]
+        for object_id, artwork in results:
+            if artwork is not False:
+                attempts.pop(str(object_id), None)
+        done += len(results)
+        print(f"   {done}/{len(object_ids)}")
+
+    skipped = []
+    for object_id in failed:
+        attempts[str(object_id)] = attempts.get(str(object_id), 0) + 1
+        if attempts[str(object_id)] >= MAX_ATTEMPTS:
+            skipped.append(object_id)
+            del attempts[str(object_id)]
+    if skipped:
+        known_skipped = json.loads(mirror.get_state('skipped_ids') or '[]')
+        mirror.set_state('skipped_ids', json.dumps(sorted(set(known_skipped) | set(skipped))))
+        print(f"⚠️ Gave up on {len(skipped)} objects after {MAX_ATTEMPTS} failed runs: {skipped[:10]}")
+    failed = [object_id for object_id in failed if str(object_id) in attempts]
+    mirror.set_state('failed_attempts', json.dumps(attempts))
+
+    left_over = failed + left_over
+    if left_over:
+        mirror.set_state('pending_ids', json.dumps(left_over))
+        mirror.set_state('pending_sync_date', sync_date)
+        print(f"⏳ {len(left_over)} objects left for the next run ({len(failed)} failed)")
+    else:
+        mirror.set_state('pending_ids', '')
+        mirror.set_state('last_sync', sync_date)
+    print(f"✅ Mirror has {len(mirror)} objects")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or refresh the local Met collection mirror")
+    parser.add_argument('command', choices=['ingest', 'search'])
+    parser.add_argument('query', nargs='?', default='')
+    parser.add_argument('--db', default='met_mirror.db')
+    parser.add_argument('--full', action='store_true', help="ignore the last sync date")
+    parser.add_argument('--limit', type=int, help="fetch at most this many objects")
+    args = parser.parse_args()
+
+    mirror = MetMirror(args.db)
+
+    if args.command == 'search':
+        for artwork in mirror.search(args.query, max_results=10):
+            print(f"{artwork['object_id']}: {artwork['title']} — {artwork['artist']}")
+        return
+
+    async def run():
+        api = AsyncMetMuseumAPI()
+        try:
+            await ingest(mirror, api, full=args.full, limit=args.limit)
+        finally:
+            await api.close()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
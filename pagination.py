@@ -0,0 +1,139 @@
+import asyncio
+import secrets
+import time
+from collections import OrderedDict
+
+
+class _Cursor:
+    __slots__ = ('object_ids', 'position', 'page_size', 'touched', 'prefetch', 'prefetch_position')
+
+    def __init__(self, object_ids, position, page_size):
+        self.object_ids = object_ids
+        self.position = position
+        self.page_size = page_size
+        self.touched = time.monotonic()
+        self.prefetch = None
+        self.prefetch_position = None
+
+    @property
+    def has_more(self):
+        return self.position < len(self.object_ids)
+
+
+class ResultPager:
+    """Server-side cursors over search results, for "Next page" buttons.
+
+    open() keeps the objectID list of a search and returns a short token for
+    the button's callback_data (Telegram allows 64 bytes there). Cursors live
+    in this process: cluster.py sends every update of a chat to the same
+    worker. While the user looks at one page, the details and images of the
+    next one are fetched in the background, so next_page() is normally
+    answered from memory and the image cache.
+    """
+
+    def __init__(self, api, image_proxy=None, max_cursors=5000, ttl=3600):
+        self.api = api
+        self.image_proxy = image_proxy
+        self.max_cursors = max_cursors
+        self.ttl = ttl
+        self.stats = {'pages': 0, 'prefetch_hits': 0, 'expired': 0}
+        self._cursors = OrderedDict()
+
+    def __len__(self):
+        return len(self._cursors)
+
+    def open(self, object_ids, shown, page_size=3):
+        """Cursor after the artworks already shown; returns its token, or None if nothing is left"""
+        object_ids = list(object_ids)
+        cursor = _Cursor(object_ids, self._position_after(object_ids, 0, shown, page_size), page_size)
+        if not cursor.has_more:
+            return None
+
+        token = secrets.token_urlsafe(6)
+        self._cursors[token] = cursor
+        while len(self._cursors) > self.max_cursors:
+            _, old = self._cursors.popitem(last=False)
+            self._cancel_prefetch(old)
+        self._start_prefetch(cursor)
+        return token
+
+    async def next_page(self, token):
+        """(artworks, has_more) of the next page, or None if the cursor expired"""
+        cursor = self._cursors.get(token)
+        if cursor is None or time.monotonic() - cursor.touched > self.ttl:
+            self.stats['expired'] += 1
+            self.close_cursor(token)
+            return None
+        self._cursors.move_to_end(token)
+        cursor.touched = time.monotonic()
+        self.stats['pages'] += 1
+
+        start = cursor.position
+        if cursor.prefetch is not None and cursor.prefetch_position == start and not cursor.prefetch.cancelled():
+            self.stats['prefetch_hits'] += 1
+            # shield: a user giving up must not cancel the shared fetch
+            artworks = await asyncio.shield(cursor.prefetch)
+        else:
+            artworks = None
+        if not artworks:
+            artworks = await self._fetch_page(cursor.object_ids, start, cursor.page_size)
+
+        # Two quick clicks on the same button must not skip a page
+        if cursor.position == start:
+            cursor.position = self._position_after(cursor.object_ids, start, artworks, cursor.page_size)
+            self._start_prefetch(cursor)
+        return artworks, cursor.has_more
+
+    def close_cursor(self, token):
+        cursor = self._cursors.pop(token, None)
+        if cursor is not None:
+            self._cancel_prefetch(cursor)
+
+    def close(self):
+        for cursor in self._cursors.values():
+            self._cancel_prefetch(cursor)
+        self._cursors.clear()
+
+    def _position_after(self, object_ids, start, artworks, page_size):
+        """Index of the first ID after the last artwork of a page that began at `start`"""
+        if len(artworks) < page_size:
+            # The lookup ran out of IDs with images in its scan window
+            return min(len(object_ids), start + page_size * self.api.max_scan_factor)
+        last = artworks[-1].get('object_id')
+        try:
+            return object_ids.index(last, start) + 1
+        except ValueError:
+            return start + len(artworks)
+
+    async def _fetch_page(self, object_ids, start, page_size):
+        window = object_ids[start:start + page_size * self.api.max_scan_factor]
+        return await self.api.get_artworks(window, max_results=page_size)
+
+    def _start_prefetch(self, cursor):
+        self._cancel_prefetch(cursor)
+        if cursor.has_more:
+            cursor.prefetch_position = cursor.position
+            cursor.prefetch = asyncio.ensure_future(self._prefetch(cursor.object_ids, cursor.position, cursor.page_size))
+
+    async def _prefetch(self, object_ids, start, page_size):
+        """Details of the page, with their images already in the image cache"""
+        try:
+            artworks = await self._fetch_page(object_ids, start, page_size)
+            if self.image_proxy is not None:
+                file_cache = self.api.cache
+                await asyncio.gather(*(
+                    self.image_proxy.get_photo(artwork) for artwork in artworks
+                    if file_cache is None or not file_cache.get_file_id(artwork.get('object_id'))
+                ), return_exceptions=True)
+            return artworks
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Prefetch error: {e}")
+            return []
+
+    @staticmethod
+    def _cancel_prefetch(cursor):
+        if cursor.prefetch is not None and not cursor.prefetch.done():
+            cursor.prefetch.cancel()
+        cursor.prefetch = None
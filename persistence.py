@@ -0,0 +1,117 @@
+import time
+
+from telegram.ext import BasePersistence, PersistenceInput
+
+from database import USER_PREF_COLUMNS
+
+
+class UsersTablePersistence(BasePersistence):
+    """python-telegram-bot persistence for user preferences, kept in the users table.
+
+    Nothing is loaded at startup (get_user_data returns an empty dict), so
+    start time does not depend on the number of users. A user's preferences
+    are read when one of their updates arrives (refresh_user_data), and read
+    again when the stored row is newer than our copy: with cluster.py a
+    user's private and group chats can be on different workers.
+    Changes are write-behind: PTB hands user_data over every `update_interval`
+    seconds, and only preferences that differ from what we last loaded or
+    wrote (and are not already queued) go out with the next batch of the
+    ArtBotDatabase writer. A snapshot moves to the new values only once the
+    writer has committed them.
+    Only user_data is persisted; chat, bot and callback data stay in memory.
+    """
+
+    def __init__(self, db, update_interval=5, recheck_interval=2.0):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval,
+        )
+        self.db = db
+        # How often a user's row is checked for changes made by other workers
+        self.recheck_interval = recheck_interval
+        # user_id -> (preferences as last loaded or written, their prefs_updated)
+        self._snapshots = {}
+        self._checked = {}
+        db.add_prefs_listener(self._prefs_written)
+
+    async def get_user_data(self):
+        return {}
+
+    async def refresh_user_data(self, user_id, user_data):
+        now = time.monotonic()
+        if now - self._checked.get(user_id, -self.recheck_interval) < self.recheck_interval:
+            return
+        self._checked[user_id] = now
+
+        stored = await self.db.load_user_prefs(user_id, USER_PREF_COLUMNS + ('prefs_updated',))
+        updated = stored.pop('prefs_updated', 0)
+        snapshot, snapshot_updated = self._snapshots.get(user_id, ({}, None))
+        if snapshot_updated is not None and updated <= snapshot_updated:
+            return
+
+        for key in USER_PREF_COLUMNS:
+            if user_data.get(key) != snapshot.get(key):
+                continue  # changed here and not handed to us yet: ours is newer
+            if key in stored:
+                user_data[key] = stored[key]
+            else:
+                user_data.pop(key, None)
+        self._snapshots[user_id] = (stored, updated)
+
+    async def update_user_data(self, user_id, data):
+        # PTB calls this for every user who had an update, changed or not
+        snapshot, _ = self._snapshots.get(user_id, ({}, None))
+        expected = {**snapshot, **self.db.queued_prefs(user_id)}
+        changed = {key: data.get(key) for key in USER_PREF_COLUMNS if data.get(key) != expected.get(key)}
+        if changed:
+            self.db.record_user_prefs(user_id, changed, time.time())
+
+    async def drop_user_data(self, user_id):
+        self.db.record_user_prefs(user_id, {key: None for key in USER_PREF_COLUMNS}, time.time())
+
+    def _prefs_written(self, user_id, values):
+        """ArtBotDatabase listener: preferences of a user were committed"""
+        updated = values['prefs_updated']
+        snapshot, snapshot_updated = self._snapshots.get(user_id, ({}, None))
+        if snapshot_updated is not None and snapshot_updated > updated:
+            return  # a newer row was loaded meanwhile
+        written = {key: values[key] for key in USER_PREF_COLUMNS if key in values}
+        prefs = {key: value for key, value in {**snapshot, **written}.items() if value is not None}
+        self._snapshots[user_id] = (prefs, updated)
+
+    async def flush(self):
+        await self.db.flush()
+
+    # ==================== NOT PERSISTED ====================
+    async def get_chat_data(self):
+        return {}
+
+    async def get_bot_data(self):
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name):
+        return {}
+
+    async def update_conversation(self, name, key, new_state):
+        pass
+
+    async def update_chat_data(self, chat_id, data):
+        pass
+
+    async def update_bot_data(self, data):
+        pass
+
+    async def update_callback_data(self, data):
+        pass
+
+    async def drop_chat_data(self, chat_id):
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
@@ -0,0 +1,76 @@
+import asyncio
+from collections import deque
+
+
+class RandomArtworkPool:
+    """Pool of pre-fetched random artworks for /random.
+
+    Artworks are drawn uniformly from the whole ID list of the query, checked
+    for an image and fetched in advance, so get() is normally answered from
+    memory. The pool refills itself in the background when it runs low.
+    """
+
+    def __init__(self, api, size=20, low_water=10, batch_size=5, query='art'):
+        self.api = api
+        self.size = size
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self.query = query
+        self.stats = {'served_from_pool': 0, 'served_direct': 0}
+
+        self._pool = deque()
+        self._pooled_ids = set()
+        self._refill_task = None
+
+    def __len__(self):
+        return len(self._pool)
+
+    def start(self):
+        """Start filling the pool (call from a running event loop)"""
+        self._ensure_refill()
+
+    async def get(self):
+        """Return a random artwork, or None if the Met could not be reached"""
+        if len(self._pool) <= self.low_water:
+            self._ensure_refill()
+
+        if self._pool:
+            self.stats['served_from_pool'] += 1
+            return self._take()
+
+        # Pool is empty (cold start or upstream trouble): fetch directly
+        self.stats['served_direct'] += 1
+        artworks = await self.api.get_random_artworks(1, self.query)
+        return artworks[0] if artworks else None
+
+    def _take(self):
+        artwork = self._pool.popleft()
+        self._pooled_ids.discard(artwork.get('object_id'))
+        return artwork
+
+    def _ensure_refill(self):
+        if self._refill_task is None or self._refill_task.done():
+            self._refill_task = asyncio.ensure_future(self._refill())
+
+    async def _refill(self):
+        """Top the pool up to `size` artworks (no more than the query has IDs)"""
+        size = min(self.size, len(await self.api.search_ids(self.query)))
+        failures = 0
+        while len(self._pool) < size and failures < 3:
+            wanted = min(self.batch_size, size - len(self._pool))
+            artworks = await self.api.get_random_artworks(wanted, self.query)
+
+            added = 0
+            for artwork in artworks:
+                if artwork.get('object_id') not in self._pooled_ids:
+                    self._pooled_ids.add(artwork.get('object_id'))
+                    self._pool.append(artwork)
+                    added += 1
+            if not added:
+                # Upstream trouble, or every draw is already in the pool
+                failures += 1
+                await asyncio.sleep(failures)
+
+    async def close(self):
+        if self._refill_task is not None:
+            self._refill_task.cancel()
@@ -0,0 +1,275 @@
+import asyncio
+import random
+import time
+from collections import deque
+
+import httpx
+
+# Statuses worth another attempt: rate limited or a temporary upstream problem
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """The upstream is considered unhealthy; the request was not sent"""
+
+
+class TokenBucket:
+    """Limits requests per second; `burst` requests may go out back to back"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        # The lock makes waiters take tokens in arrival order
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class RetryBudget:
+    """Caps retries at `ratio` of first attempts (plus a small floor).
+
+    Every request earns `ratio` of a retry, every retry spends one. When the
+    upstream is failing everywhere this keeps retries from multiplying the
+    load; `min_per_second` still allows a few retries when traffic is low.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=1.0, max_balance=20.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.max_balance = max_balance
+        self._balance = max_balance
+        self._updated = time.monotonic()
+
+    def _refill(self, earned=0.0):
+        now = time.monotonic()
+        self._balance = min(self.max_balance,
+                            self._balance + earned + (now - self._updated) * self.min_per_second)
+        self._updated = now
+
+    def record_request(self):
+        self._refill(self.ratio)
+
+    def try_spend(self):
+        """Take one retry from the budget; False if it is used up"""
+        self._refill()
+        if self._balance < 1:
+            return False
+        self._balance -= 1
+        return True
+
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` failures in a row and then fails fast.
+
+    After `recovery_time` seconds one probe request is let through (half
+    open): success closes the breaker, failure keeps it open for another
+    `recovery_time`.
+    """
+
+    def __init__(self, failure_threshold=5, recovery_time=30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def allow_request(self):
+        if self.state == 'closed':
+            return True
+        now = time.monotonic()
+        if now - self._opened_at >= self.recovery_time:
+            # Let one probe through; the next one only after another recovery_time
+            self.state = 'half_open'
+            self._opened_at = now
+            return True
+        return False
+
+    @property
+    def is_open(self):
+        return self.state != 'closed' and time.monotonic() - self._opened_at < self.recovery_time
+
+    def record_success(self):
+        self.state = 'closed'
+        self._failures = 0
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == 'half_open' or self._failures >= self.failure_threshold:
+            if self.state == 'closed':
+                print(f"⚡ Circuit breaker open after {self._failures} failures")
+            self.state = 'open'
+            self._opened_at = time.monotonic()
+
+
+class ResiliencePolicy:
+    """Middleware around every request to one upstream host.
+
+    call(send) runs `send` (a coroutine function returning an httpx.Response)
+    behind the circuit breaker and the rate limiter, and retries timeouts,
+    connection errors, 429 and 5xx with jittered exponential backoff while the
+    retry budget allows it. Other responses (including 404) are returned to the
+    caller as they are.
+    """
+
+    def __init__(self, rate=40.0, burst=None, max_retries=3, backoff_base=0.25, backoff_cap=8.0,
+                 retry_budget=None, breaker=None):
+        self.limiter = TokenBucket(rate, burst) if rate else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.retry_budget = retry_budget or RetryBudget()
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = {'requests': 0, 'retries': 0, 'failures': 0, 'short_circuited': 0, 'budget_exhausted': 0}
+
+    def backoff(self, attempt, response=None):
+        """Full-jitter exponential delay; honours Retry-After on 429/503"""
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), self.backoff_cap))
+        return delay
+
+    async def call(self, send):
+        if not self.breaker.allow_request():
+            self.stats['short_circuited'] += 1
+            raise CircuitOpenError("Met API unavailable (circuit open)")
+
+        self.stats['requests'] += 1
+        self.retry_budget.record_request()
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                await self.limiter.acquire()
+
+            error = response = None
+            try:
+                response = await send()
+            except httpx.TransportError as e:  # timeouts, refused/reset connections
+                error = e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.breaker.record_success()
+                    return response
+
+            self.breaker.record_failure()
+            if attempt >= self.max_retries or self.breaker.is_open:
+                break
+            if not self.retry_budget.try_spend():
+                self.stats['budget_exhausted'] += 1
+                break
+
+            self.stats['retries'] += 1
+            await asyncio.sleep(self.backoff(attempt, response))
+            attempt += 1
+
+        self.stats['failures'] += 1
+        if error is not None:
+            raise error
+        return response  # the caller's raise_for_status() reports it
+
+
+class HedgingPolicy:
+    """Sends a second copy of a slow request and takes whichever answers first.
+
+    The hedge fires when the first request has not finished after the
+    `percentile` latency of recent requests (clamped to min_delay..max_delay).
+    Latencies come from record(), which the client calls with the time of the
+    HTTP call alone: time spent waiting for a local connection slot or rate
+    limiter token is our own queue, and hedging into it only makes it longer.
+    For the same reason no hedge is sent while run()'s `can_hedge` says the
+    client is saturated. Hedges are capped by their own budget at `ratio` of
+    requests, so the extra load stays around that share even when the
+    upstream is slow for everyone.
+    """
+
+    def __init__(self, percentile=95, ratio=0.05, min_delay=0.05, max_delay=2.0, window=500, min_samples=50):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.budget = RetryBudget(ratio=ratio, min_per_second=0.0, max_balance=5.0)
+        self.stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'budget_exhausted': 0, 'saturated': 0}
+        self._latencies = deque(maxlen=window)
+        self._delay = None
+        self._samples_since_update = 0
+
+    def delay(self):
+        """Current hedge delay in seconds, or None until enough latencies were seen"""
+        return self._delay
+
+    def record(self, latency):
+        """Add the latency (seconds) of one upstream HTTP call"""
+        self._latencies.append(latency)
+        self._samples_since_update += 1
+        # Re-sorting the window on every response would cost more than it helps
+        if len(self._latencies) >= self.min_samples and (self._delay is None or self._samples_since_update >= 20):
+            self._samples_since_update = 0
+            ordered = sorted(self._latencies)
+            value = ordered[min(len(ordered) - 1, len(ordered) * self.percentile // 100)]
+            self._delay = min(self.max_delay, max(self.min_delay, value))
+
+    def latency_percentiles(self):
+        """p50/p95/p99 of recent request latencies in milliseconds"""
+        if not self._latencies:
+            return {}
+        ordered = sorted(self._latencies)
+        return {f"p{p}": round(ordered[min(len(ordered) - 1, len(ordered) * p // 100)] * 1000, 1)
+                for p in (50, 95, 99)}
+
+    def summary(self):
+        """One log line with the hedge counters and latency percentiles"""
+        latencies = ', '.join(f"{name} {value} ms" for name, value in self.latency_percentiles().items())
+        counters = ', '.join(f"{name} {value}" for name, value in self.stats.items())
+        return f"hedging: {counters}; latency: {latencies or 'no samples'}"
+
+    async def run(self, make_request, can_hedge=None):
+        """Await make_request() (a coroutine factory), hedging it if it is slow.
+
+        can_hedge() returning False (the client has no free slot) skips the hedge.
+        """
+        self.stats['requests'] += 1
+        self.budget.record_request()
+        first = asyncio.ensure_future(make_request())
+        tasks = {first}
+        try:
+            delay = self.delay()
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    if can_hedge is not None and not can_hedge():
+                        self.stats['saturated'] += 1
+                    elif self.budget.try_spend():
+                        self.stats['hedged'] += 1
+                        tasks.add(asyncio.ensure_future(make_request()))
+                    else:
+                        self.stats['budget_exhausted'] += 1
+
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not first:
+                            self.stats['hedge_wins'] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            if not first.done():
+                first.cancel()
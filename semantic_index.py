@@ -0,0 +1,292 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sqlite3
+from collections import OrderedDict
+
+import ollama
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: without it there is no semantic search
+    np = None
+
+# Embedding index over the locally known artworks (met_mirror.db and
+# artwork_cache.db), for mood/description queries the Met keyword search
+# cannot answer ("peaceful blue sea at dusk").
+#
+#   ollama pull nomic-embed-text
+#   python semantic_index.py build            # after `met_mirror.py ingest`, rerun to refresh
+#   python semantic_index.py search "peaceful blue sea at dusk"
+#
+# Files in the index directory:
+#   vectors.f32   N x dim float32 matrix, rows L2-normalized (memory-mapped)
+#   ids.npy       objectID of each row
+#   meta.json     model, dim, count, query prefix, calibrated min_score and,
+#                 for large collections, the IVF lists
+#   centroids.npy IVF cluster centres; rows of one cluster are stored together
+
+EMBED_MODEL = "nomic-embed-text"
+INDEX_DIR = "semantic_index"
+
+# (document prefix, query prefix) the model was trained with
+TASK_PREFIXES = {
+    'nomic-embed-text': ('search_document: ', 'search_query: '),
+}
+
+
+def artwork_text(artwork):
+    """The text that is embedded for an artwork"""
+    fields = ('title', 'artist', 'culture', 'medium', 'department')
+    return '. '.join(str(artwork[f]) for f in fields if artwork.get(f))
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+class SemanticIndex:
+    """Top-k cosine search over a memory-mapped embedding matrix.
+
+    Small collections are scanned in full (one matrix-vector product). When
+    the build job found more than `ivf_threshold` artworks it clusters them
+    (IVF): a query is scored against the cluster centres first and only the
+    `nprobe` closest clusters are scanned.
+    """
+
+    def __init__(self, index_dir=INDEX_DIR, nprobe=8, query_cache_size=500, min_score=None):
+        with open(os.path.join(index_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.model = self.meta['model']
+        self.query_prefix = self.meta.get('query_prefix', '')
+        # Scores below this are no better than unrelated artworks (see _calibrate)
+        self.min_score = min_score if min_score is not None else self.meta.get('min_score', 0.0)
+        self.nprobe = nprobe
+        count, dim = self.meta['count'], self.meta['dim']
+        self.vectors = np.memmap(os.path.join(index_dir, 'vectors.f32'), dtype=np.float32, mode='r',
+                                 shape=(count, dim))
+        self.ids = np.load(os.path.join(index_dir, 'ids.npy'))
+        self.offsets = self.meta.get('offsets')
+        self.centroids = np.load(os.path.join(index_dir, 'centroids.npy')) if self.offsets else None
+
+        self.query_cache_size = query_cache_size
+        self._query_vectors = OrderedDict()
+        self._client = None
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR, **kwargs):
+        """The index in index_dir, or None if NumPy or the index is missing"""
+        if np is None or not os.path.exists(os.path.join(index_dir, 'meta.json')):
+            return None
+        try:
+            return cls(index_dir, **kwargs)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Semantic index not loaded: {e}")
+            return None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search_vector(self, query, k=5):
+        """[(object_id, score)] of the k rows most similar to a normalized vector"""
+        if self.centroids is None:
+            rows = np.arange(len(self.ids))
+            scores = self.vectors @ query
+        else:
+            closest = np.argsort(self.centroids @ query)[::-1][:self.nprobe]
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in closest])
+            scores = self.vectors[rows] @ query
+
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[rows[i]]), float(scores[i])) for i in top]
+
+    async def search(self, text, k=5, min_score=None):
+        """[(object_id, score)] of the artworks closest to a free-text query"""
+        query = await self._embed_query(text)
+        if query is None:
+            return []
+        if min_score is None:
+            min_score = self.min_score
+        results = await asyncio.to_thread(self.search_vector, query, k)
+        return [(object_id, score) for object_id, score in results if score >= min_score]
+
+    async def _embed_query(self, text):
+        key = ' '.join(text.lower().split())
+        if key in self._query_vectors:
+            self._query_vectors.move_to_end(key)
+            return self._query_vectors[key]
+
+        if self._client is None:
+            self._client = ollama.AsyncClient()
+        try:
+            response = await self._client.embed(model=self.model, input=self.query_prefix + text)
+        except Exception as e:
+            print(f"Embedding error: {e}")
+            return None
+
+        vector = np.asarray(response['embeddings'][0], dtype=np.float32)
+        if vector.shape[0] != self.vectors.shape[1]:
+            print(f"Embedding model returned {vector.shape[0]} dimensions, index has {self.vectors.shape[1]}")
+            return None
+        vector /= np.linalg.norm(vector) or 1
+
+        self._query_vectors[key] = vector
+        while len(self._query_vectors) > self.query_cache_size:
+            self._query_vectors.popitem(last=False)
+        return vector
+
+
+# ==================== BUILD ====================
+def load_artworks(mirror_path="met_mirror.db", cache_path="artwork_cache.db"):
+    """objectID -> artwork for everything with an image in the mirror and the cache"""
+    artworks = {}
+    if os.path.exists(cache_path):
+        conn = sqlite3.connect(cache_path)
+        for object_id, data in conn.execute("SELECT object_id, data FROM artworks WHERE data IS NOT NULL"):
+            artworks[object_id] = json.loads(data)
+        conn.close()
+    if os.path.exists(mirror_path):
+        conn = sqlite3.connect(mirror_path)
+        conn.row_factory = sqlite3.Row
+        for row in conn.execute("SELECT * FROM objects WHERE image_url != ''"):
+            artworks[row['object_id']] = dict(row)
+        conn.close()
+    return artworks
+
+
+def task_prefixes(model):
+    """(document prefix, query prefix) for an Ollama model name like 'nomic-embed-text:latest'"""
+    return TASK_PREFIXES.get(model.split(':')[0], ('', ''))
+
+
+def _calibrate(client, model, query_prefix, artworks, ids, vectors, samples=200, seed=0):
+    """Score that queries reach on unrelated artworks (99th percentile).
+
+    Titles of some artworks are embedded as queries and scored against other,
+    randomly drawn artworks; a match has to score above this noise floor.
+    """
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(ids), min(samples, len(ids)), replace=False)
+    titles = [query_prefix + (artworks[int(ids[i])].get('title') or 'artwork') for i in picks]
+    queries = _normalize_rows(np.asarray(client.embed(model=model, input=titles)['embeddings'], dtype=np.float32))
+    others = np.asarray(vectors[np.sort(rng.choice(len(ids), len(picks), replace=False))])
+    scores = queries @ others.T
+    return float(np.percentile(scores, 99))
+
+
+def _kmeans(vectors, clusters, iterations=10, sample_size=50000, seed=0):
+    """Spherical k-means centres of (a sample of) normalized vectors"""
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(len(vectors), min(sample_size, len(vectors)), replace=False)]
+    centroids = sample[rng.choice(len(sample), clusters, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(sample @ centroids.T, axis=1)
+        for c in range(clusters):
+            members = sample[assignment == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize_rows(centroids)
+    return centroids.astype(np.float32)
+
+
+def build(index_dir=INDEX_DIR, model=EMBED_MODEL, mirror_path="met_mirror.db", cache_path="artwork_cache.db",
+          batch_size=64, ivf_threshold=50000):
+    """Embed all local artworks and write the index to index_dir (replacing it)"""
+    if np is None:
+        raise SystemExit("NumPy is required to build the semantic index (pip install numpy)")
+
+    artworks = load_artworks(mirror_path, cache_path)
+    if not artworks:
+        raise SystemExit("No artworks found: run `python met_mirror.py ingest` first")
+    ids = np.fromiter(artworks, dtype=np.int64, count=len(artworks))
+    document_prefix, query_prefix = task_prefixes(model)
+    print(f"🧮 Embedding {len(ids)} artworks with {model}...")
+
+    tmp_dir = index_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    vectors_path = os.path.join(tmp_dir, 'vectors.f32')
+
+    client = ollama.Client()
+    vectors = None
+    for start in range(0, len(ids), batch_size):
+        batch = [document_prefix + (artwork_text(artworks[int(i)]) or 'artwork')
+                 for i in ids[start:start + batch_size]]
+        embeddings = np.asarray(client.embed(model=model, input=batch)['embeddings'], dtype=np.float32)
+        if vectors is None:
+            vectors = np.memmap(vectors_path, dtype=np.float32, mode='w+', shape=(len(ids), embeddings.shape[1]))
+        vectors[start:start + len(batch)] = _normalize_rows(embeddings)
+        if (start // batch_size) % 50 == 0:
+            print(f"   {start + len(batch)}/{len(ids)}")
+    vectors.flush()
+    dim = vectors.shape[1]
+    meta = {'model': model, 'dim': dim, 'count': len(ids), 'query_prefix': query_prefix,
+            'min_score': _calibrate(client, model, query_prefix, artworks, ids, vectors)}
+    print(f"📏 min_score {meta['min_score']:.3f} (99th percentile of unrelated query/artwork pairs)")
+
+    if len(ids) > ivf_threshold:
+        clusters = int(np.sqrt(len(ids)))
+        print(f"🗂️  Clustering into {clusters} IVF lists...")
+        centroids = _kmeans(vectors, clusters)
+        assignment = np.concatenate([
+            np.argmax(vectors[start:start + 10000] @ centroids.T, axis=1)
+            for start in range(0, len(ids), 10000)
+        ])
+        order = np.argsort(assignment, kind='stable')
+
+        # Rewrite the matrix so every cluster is one contiguous block
+        ordered_path = os.path.join(tmp_dir, 'vectors.ordered')
+        ordered = np.memmap(ordered_path, dtype=np.float32, mode='w+', shape=(len(ids), dim))
+        for start in range(0, len(ids), 10000):
+            ordered[start:start + 10000] = vectors[order[start:start + 10000]]
+        ordered.flush()
+        del ordered, vectors
+        os.replace(ordered_path, vectors_path)
+
+        ids = ids[order]
+        counts = np.bincount(assignment, minlength=clusters)
+        meta['offsets'] = [0] + np.cumsum(counts).tolist()
+        np.save(os.path.join(tmp_dir, 'centroids.npy'), centroids)
+
+    np.save(os.path.join(tmp_dir, 'ids.npy'), ids)
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(index_dir, ignore_errors=True)
+    os.replace(tmp_dir, index_dir)
+    print(f"✅ Semantic index with {len(ids)} artworks in {index_dir}/")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the local semantic artwork index")
+    parser.add_argument('command', choices=['build', 'search'])
+    parser.add_argument('query', nargs='?', default='')
+    parser.add_argument('--dir', default=INDEX_DIR)
+    parser.add_argument('--model', default=EMBED_MODEL)
+    parser.add_argument('--mirror', default='met_mirror.db')
+    parser.add_argument('--cache', default='artwork_cache.db')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build(args.dir, args.model, args.mirror, args.cache)
+        return
+
+    index = SemanticIndex.load(args.dir)
+    if index is None:
+        raise SystemExit("No semantic index: run `python semantic_index.py build` first")
+    artworks = load_artworks(args.mirror, args.cache)
+    for object_id, score in asyncio.run(index.search(args.query, k=10)):
+        artwork = artworks.get(object_id, {})
+        print(f"{score:.3f}  {object_id}: {artwork.get('title')} — {artwork.get('artist')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+class StateBackend:
+    """State shared by all bot worker processes: caches of upstream results.
+
+    User preferences are not kept here: they are in the users table of
+    ultra_art_bot.db (see persistence.py), next to the rest of the user's
+    data, which every worker opens in WAL mode. Methods are blocking; async
+    callers run them with asyncio.to_thread.
+
+    Subclass this to keep the state somewhere else (Redis, Postgres, ...) and
+    register the URL scheme in create_state_backend.
+    """
+
+    def cache_get(self, key, max_age):
+        """Cached value if it is younger than max_age seconds, else None"""
+        raise NotImplementedError
+
+    def cache_set(self, key, value):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteStateBackend(StateBackend):
+    """Default backend: one SQLite file in WAL mode, shared between processes"""
+
+    def __init__(self, db_path="shared_state.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS shared_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                stored_at REAL
+            );
+        """)
+        self._conn.commit()
+
+    def cache_get(self, key, max_age):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM shared_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row and time.time() - row[1] < max_age:
+            return json.loads(row[0])
+        return None
+
+    def cache_set(self, key, value):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO shared_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time())
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def create_state_backend(url="sqlite:///shared_state.db"):
+    """Backend for a URL like sqlite:///relative.db or sqlite:////absolute/path.db"""
+    scheme, _, location = url.partition('://')
+    if scheme == 'sqlite':
+        path = location[1:] if location.startswith('/') else location
+        return SQLiteStateBackend(path or 'shared_state.db')
+    raise ValueError(f"Unknown state backend: {url}")
@@ -0,0 +1,195 @@
+import argparse
+import functools
+import heapq
+import math
+import os
+import re
+import sqlite3
+import time
+from collections import defaultdict
+
+from dates import artwork_period
+from semantic_index import load_artworks
+
+# "Similar works": nearest neighbours of every locally known artwork by its
+# metadata (artist, culture, medium, period, department), precomputed by a
+# batch job so the bot answers a click with one dict lookup.
+#
+#   python similar_index.py build      # after `met_mirror.py ingest`, rerun to refresh
+#   python similar_index.py show 436535
+#
+# Each artwork is a sparse TF-IDF vector of features like "artist:claude monet"
+# or "medium:canvas", weighted per feature group. Neighbours are found through
+# an inverted index; very common features ("period:Modern Art") only add to
+# the scores of candidates found through rarer ones.
+
+INDEX_PATH = "similar_artworks.db"
+
+FEATURE_WEIGHTS = {'artist': 3.0, 'period': 1.5, 'culture': 1.0, 'medium': 1.0, 'department': 0.5}
+MEDIUM_STOP_WORDS = {'and', 'with', 'on', 'of', 'in', 'the', 'or', 'over', 'traces', 'other'}
+UNKNOWN_ARTISTS = {'', 'unknown', 'unknown artist', 'anonymous'}
+
+
+def artwork_features(artwork):
+    """Feature -> group weight for one artwork"""
+    features = {}
+    artist = (artwork.get('artist') or '').strip().lower()
+    if artist not in UNKNOWN_ARTISTS:
+        features[f"artist:{artist}"] = FEATURE_WEIGHTS['artist']
+    for group in ('culture', 'department'):
+        value = (artwork.get(group) or '').strip().lower()
+        if value:
+            features[f"{group}:{value}"] = FEATURE_WEIGHTS[group]
+    period = artwork_period(artwork)
+    if period:
+        features[f"period:{period}"] = FEATURE_WEIGHTS['period']
+    for word in re.findall(r'[a-z]{3,}', (artwork.get('medium') or '').lower()):
+        if word not in MEDIUM_STOP_WORDS:
+            features[f"medium:{word}"] = FEATURE_WEIGHTS['medium']
+    return features
+
+
+def tfidf_vectors(artworks):
+    """objectID -> L2-normalized {feature: weight}"""
+    features = {object_id: artwork_features(artwork) for object_id, artwork in artworks.items()}
+    df = defaultdict(int)
+    for feats in features.values():
+        for feature in feats:
+            df[feature] += 1
+
+    total = len(features)
+    vectors = {}
+    for object_id, feats in features.items():
+        vector = {f: w * math.log(total / df[f]) for f, w in feats.items() if df[f] < total}
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        if norm:
+            vectors[object_id] = {f: v / norm for f, v in vector.items()}
+    return vectors
+
+
+def nearest_neighbours(vectors, k=10, max_postings=100):
+    """Yield (objectID, [neighbour objectIDs]) for every vector, most similar first"""
+    postings = defaultdict(list)
+    for object_id, vector in vectors.items():
+        for feature, value in vector.items():
+            postings[feature].append((value, object_id))
+    common = set()
+    for feature, entries in postings.items():
+        if len(entries) > max_postings:
+            common.add(feature)
+            # Keep the artworks for which this feature matters most
+            postings[feature] = heapq.nlargest(max_postings, entries)
+
+    for object_id, vector in vectors.items():
+        scores = defaultdict(float)
+        for feature, value in vector.items():
+            if feature in common:
+                continue
+            for other_value, other in postings[feature]:
+                scores[other] += value * other_value
+
+        if not scores:
+            # Only common features: take candidates from the rarest of them
+            rarest = max(vector, key=lambda f: vector[f], default=None)
+            for _, other in postings.get(rarest, []):
+                scores[other] = 0.0
+        scores.pop(object_id, None)
+
+        # Exact scores: add the common features the candidates share
+        for feature in common.intersection(vector):
+            value = vector[feature]
+            for other in scores:
+                scores[other] += value * vectors[other].get(feature, 0.0)
+
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        yield object_id, [other for other, score in best if score > 0]
+
+
+def build(index_path=INDEX_PATH, mirror_path="met_mirror.db", cache_path="artwork_cache.db", k=10):
+    """Precompute neighbours of all local artworks into index_path (replacing it)"""
+    artworks = load_artworks(mirror_path, cache_path)
+    if not artworks:
+        raise SystemExit("No artworks found: run `python met_mirror.py ingest` first")
+
+    started = time.perf_counter()
+    vectors = tfidf_vectors(artworks)
+    print(f"🧮 {len(vectors)} artwork vectors, finding {k} neighbours each...")
+
+    tmp_path = index_path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("CREATE TABLE similar (object_id INTEGER PRIMARY KEY, neighbours TEXT)")
+    batch = []
+    for done, (object_id, neighbours) in enumerate(nearest_neighbours(vectors, k), 1):
+        if neighbours:
+            batch.append((object_id, ','.join(map(str, neighbours))))
+        if len(batch) >= 5000:
+            conn.executemany("INSERT INTO similar VALUES (?, ?)", batch)
+            batch = []
+        if done % 20000 == 0:
+            print(f"   {done}/{len(vectors)}")
+    conn.executemany("INSERT INTO similar VALUES (?, ?)", batch)
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, index_path)
+    print(f"✅ Neighbours written to {index_path} in {time.perf_counter() - started:.1f}s")
+
+
+class SimilarArtworks:
+    """Precomputed neighbours, read from index_path on demand.
+
+    A lookup is one primary-key read (a few µs) behind an LRU of
+    `cache_size` artworks, so each worker process only keeps the neighbours
+    of recently shown artworks in memory, not the whole table.
+    """
+
+    def __init__(self, index_path=INDEX_PATH, cache_size=10000):
+        self._conn = sqlite3.connect(index_path) if os.path.exists(index_path) else None
+        self._lookup = functools.lru_cache(maxsize=cache_size)(self._read)
+
+    def _read(self, object_id):
+        if self._conn is None:
+            return ()
+        row = self._conn.execute("SELECT neighbours FROM similar WHERE object_id = ?", (object_id,)).fetchone()
+        return tuple(int(i) for i in row[0].split(',')) if row else ()
+
+    def __len__(self):
+        if self._conn is None:
+            return 0
+        return self._conn.execute("SELECT COUNT(*) FROM similar").fetchone()[0]
+
+    def __contains__(self, object_id):
+        return bool(self._lookup(object_id))
+
+    def neighbours(self, object_id, count=10):
+        """objectIDs of the artworks most similar to object_id (empty if unknown)"""
+        return self._lookup(object_id)[:count]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute 'Similar works' neighbours")
+    parser.add_argument('command', choices=['build', 'show'])
+    parser.add_argument('object_id', nargs='?', type=int)
+    parser.add_argument('--index', default=INDEX_PATH)
+    parser.add_argument('--mirror', default='met_mirror.db')
+    parser.add_argument('--cache', default='artwork_cache.db')
+    parser.add_argument('-k', type=int, default=10, help="neighbours per artwork")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build(args.index, args.mirror, args.cache, args.k)
+        return
+
+    artworks = load_artworks(args.mirror, args.cache)
+    for object_id in (args.object_id,) + SimilarArtworks(args.index).neighbours(args.object_id):
+        artwork = artworks.get(object_id, {})
+        print(f"{object_id}: {artwork.get('title')} — {artwork.get('artist')} ({artwork.get('medium')})")
+
+
+if __name__ == '__main__':
+    main()
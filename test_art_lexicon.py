@@ -0,0 +1,50 @@
+from art_lexicon import ARTISTS, COLOURS, MOVEMENTS, SUBJECTS, _phrase_key, match_keywords, stem, tokenize
+
+# Queries the fast path may answer alone -> (keywords, coverage).
+# Run with `python test_art_lexicon.py` (or pytest).
+GOLDEN = [
+    ("Monet water lilies", (['monet', 'water lilies'], 1.0)),
+    ("Рембрандт портрет", (['rembrandt', 'portrait'], 1.0)),
+    ("Ван Гог подсолнухи", (['van gogh', 'sunflowers'], 1.0)),
+    ("zeig mir Blumen von Monet", (['flowers', 'monet'], 1.0)),
+    ("impressionist landscapes", (['impressionism', 'landscape'], 1.0)),
+    ("women in gardens", (['woman', 'garden'], 1.0)),
+    ("horses in winter", (['horse', 'winter'], 1.0)),
+    # German aliases that are English words must not match
+    ("some kind of landscape", (['landscape'], 0.5)),
+    ("boot", ([], 0.0)),
+    # Names are not stemmed into other words
+    ("Berger", ([], 0.0)),
+]
+
+
+def test_golden_queries():
+    failures = []
+    for text, expected in GOLDEN:
+        got = match_keywords(text)
+        if got != expected:
+            failures.append(f"{text!r}: got {got}, expected {expected}")
+    assert not failures, '\n'.join(failures)
+
+
+def test_stem_is_idempotent():
+    for table in (ARTISTS, MOVEMENTS, SUBJECTS, COLOURS):
+        for keyword, aliases in table.items():
+            for word in tokenize(' '.join(aliases + [keyword])):
+                assert stem(stem(word)) == stem(word), word
+    assert stem('gardens') == stem('garden')
+
+
+def test_aliases_do_not_collide():
+    owners = {}
+    for table in (ARTISTS, MOVEMENTS, SUBJECTS, COLOURS):
+        for keyword, aliases in table.items():
+            for alias in aliases + [keyword]:
+                key = _phrase_key(alias)
+                assert owners.setdefault(key, keyword) == keyword, f"{alias!r}: {owners[key]} and {keyword}"
+
+
+if __name__ == '__main__':
+    for test in (test_golden_queries, test_stem_is_idempotent, test_aliases_do_not_collide):
+        test()
+    print(f"✅ {len(GOLDEN)} queries matched correctly")
@@ -0,0 +1,80 @@
+from dates import artwork_period, parse_date, period_for_years, periods_overlapping
+
+# Golden corpus: Met objectDate strings -> (begin, end) years and period.
+# Run with `python test_dates.py` (or pytest).
+GOLDEN = [
+    ("1889", (1889, 1889), 'Impressionism'),
+    ("ca. 1870–75", (1870, 1875), 'Impressionism'),
+    ("1870-5", (1870, 1875), 'Impressionism'),
+    ("1880/90", (1880, 1890), 'Impressionism'),
+    ("1884–86", (1884, 1886), 'Impressionism'),
+    ("ca. 1665–67", (1665, 1667), 'Baroque'),
+    ("1505", (1505, 1505), 'Renaissance'),
+    ("dated 1654", (1654, 1654), 'Baroque'),
+    ("probably 1890s", (1890, 1899), 'Post-Impressionism'),
+    ("1620s", (1620, 1629), 'Baroque'),
+    ("1880s–90s", (1880, 1899), 'Impressionism'),
+    ("ca. 1915 or later", (1915, 1915), 'Modern Art'),
+    ("June 1st, 1889", (1889, 1889), 'Impressionism'),
+    ("1885, printed 1890", (1885, 1885), 'Impressionism'),
+    ("19th century", (1800, 1899), 'Romanticism'),
+    ("19th-century", (1800, 1899), 'Romanticism'),
+    ("early 16th century", (1500, 1532), 'Renaissance'),
+    ("mid-19th century", (1833, 1865), 'Romanticism'),
+    ("late 18th–early 19th century", (1766, 1832), '18th Century'),
+    ("18th or 19th century", (1700, 1899), '18th Century'),
+    ("second half of the 19th century", (1850, 1899), 'Impressionism'),
+    ("2nd half 16th century", (1550, 1599), 'Renaissance'),
+    ("first quarter of the 20th century", (1900, 1924), 'Modern Art'),
+    ("14th century", (1300, 1399), 'Medieval'),
+    ("18th c.", (1700, 1799), '18th Century'),
+    ("5th c. B.C.", (-500, -401), 'Ancient'),
+    ("12th–13th century", (1100, 1299), 'Medieval'),
+    ("ca. 50", (50, 50), 'Ancient'),
+    ("A.D. 100–200", (100, 200), 'Ancient'),
+    ("1st century B.C.", (-100, -1), 'Ancient'),
+    ("early 2nd century B.C.", (-200, -168), 'Ancient'),
+    ("1st century B.C.–1st century A.D.", (-100, 99), 'Ancient'),
+    ("500 B.C.–A.D. 100", (-500, 100), 'Ancient'),
+    ("ca. 2000–1800 B.C.", (-2000, -1800), 'Ancient'),
+    ("ca. 3300–3100 B.C.", (-3300, -3100), 'Ancient'),
+    ("ca. 1500 BC", (-1500, -1500), 'Ancient'),
+    ("10,000 B.C.", (-10000, -10000), 'Ancient'),
+    ("ca. 12,000–10,000 B.C.", (-12000, -10000), 'Ancient'),
+    ("Ptolemaic Period, 332–30 B.C.", (-332, -30), 'Ancient'),
+    ("3rd–2nd millennium B.C.", (-3000, -1001), 'Ancient'),
+    ("Edo period (1615–1868)", (1615, 1868), '18th Century'),
+    ("1950", (1950, 1950), 'Contemporary'),
+    ("1949", (1949, 1949), 'Modern Art'),
+    ("n.d.", None, ''),
+    ("Unknown", None, ''),
+    ("", None, ''),
+]
+
+
+def test_golden_corpus():
+    failures = []
+    for text, years, period in GOLDEN:
+        got = parse_date(text)
+        if got != years or period_for_years(got) != period:
+            failures.append(f"{text!r}: got {got} {period_for_years(got)!r}, expected {years} {period!r}")
+    assert not failures, '\n'.join(failures)
+
+
+def test_numeric_dates_win():
+    artwork = {'date': '19th century', 'begin_date': 1872, 'end_date': 1874}
+    assert artwork_period(artwork) == 'Impressionism'
+    # Met uses 0/0 when it has no numeric date
+    assert artwork_period({'date': 'ca. 1665', 'begin_date': 0, 'end_date': 0}) == 'Baroque'
+    assert artwork_period({'date': 'Unknown'}) == ''
+
+
+def test_periods_overlapping():
+    assert periods_overlapping(1880, 1895) == ['Impressionism', 'Post-Impressionism']
+    assert periods_overlapping(-300, -100) == ['Ancient']
+
+
+if __name__ == '__main__':
+    for test in (test_golden_corpus, test_numeric_dates_win, test_periods_overlapping):
+        test()
+    print(f"✅ {len(GOLDEN)} golden dates parsed correctly")
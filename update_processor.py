@@ -0,0 +1,66 @@
+import asyncio
+from collections import deque
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates concurrently, but strictly one after another per chat.
+
+    Updates from different chats run in parallel (up to
+    max_concurrent_updates), while updates from the same chat wait for the
+    previous one, so a user's messages are still answered in order.
+
+    Every chat has a queue and at most one drain task, which takes a worker
+    slot when it is the chat's turn and runs the queued updates in order while
+    holding it. Updates waiting behind their chat hold no slot, so one busy
+    chat cannot keep the other chats waiting.
+    """
+
+    def __init__(self, max_concurrent_updates):
+        super().__init__(max_concurrent_updates)
+        self._slots = asyncio.Semaphore(max_concurrent_updates)
+        # chat_id -> deque of update coroutines, and the task draining it
+        self._queues = {}
+        self._drains = {}
+
+    @staticmethod
+    def _chat_id(update):
+        if isinstance(update, Update) and update.effective_chat:
+            return update.effective_chat.id
+        return None
+
+    async def do_process_update(self, update, coroutine):
+        # PTB calls this while holding its own semaphore: only queue the update here
+        chat_id = self._chat_id(update)
+        if chat_id is None:
+            async with self._slots:
+                await coroutine
+            return
+
+        self._queues.setdefault(chat_id, deque()).append(coroutine)
+        if chat_id not in self._drains:
+            self._drains[chat_id] = asyncio.ensure_future(self._drain(chat_id))
+
+    async def _drain(self, chat_id):
+        queue = self._queues[chat_id]
+        try:
+            async with self._slots:
+                while queue:
+                    try:
+                        await queue.popleft()
+                    except Exception as e:
+                        print(f"Update error in chat {chat_id}: {e}")
+        finally:
+            for coroutine in queue:
+                coroutine.close()  # cancelled on shutdown: never started
+            del self._queues[chat_id]
+            del self._drains[chat_id]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        """Let the queued updates finish (PTB flushes persistence after this)"""
+        await asyncio.gather(*list(self._drains.values()), return_exceptions=True)
@@ -0,0 +1,56 @@
+import os
+
+from dotenv import load_dotenv
+from telegram import Update
+
+from bot_ai import build_application
+from update_processor import ChatOrderedUpdateProcessor
+
+load_dotenv()
+
+
+def main():
+    """Run the bot as a webhook server with concurrent update processing.
+
+    Settings (.env):
+        TELEGRAM_TOKEN        bot token
+        WEBHOOK_URL           public HTTPS base URL Telegram should call
+        WEBHOOK_LISTEN        address to bind (default 0.0.0.0)
+        WEBHOOK_PORT          port to bind (default 8443)
+        WEBHOOK_PATH          URL path of the webhook (default: telegram)
+        WEBHOOK_SECRET        secret token Telegram sends back in every request
+        WEBHOOK_MAX_WORKERS   updates processed at the same time (default 64)
+        TELEGRAM_API_BASE_URL other Bot API server, e.g. fake_telegram.py for local tests
+    """
+    token = os.getenv('TELEGRAM_TOKEN')
+    webhook_url = os.getenv('WEBHOOK_URL')
+
+    if not token or not webhook_url:
+        print("❌ Error: TELEGRAM_TOKEN and WEBHOOK_URL must be set!")
+        return
+
+    listen = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+    port = int(os.getenv('WEBHOOK_PORT', '8443'))
+    url_path = os.getenv('WEBHOOK_PATH', 'telegram')
+    max_workers = int(os.getenv('WEBHOOK_MAX_WORKERS', '64'))
+
+    app = build_application(
+        token,
+        update_processor=ChatOrderedUpdateProcessor(max_workers),
+        base_url=os.getenv('TELEGRAM_API_BASE_URL'),
+    )
+
+    print(f"🤖 🎨 Art Museum Bot webhook on {listen}:{port}/{url_path} ({max_workers} workers)")
+
+    app.run_webhook(
+        listen=listen,
+        port=port,
+        url_path=url_path,
+        webhook_url=f"{webhook_url.rstrip('/')}/{url_path}",
+        secret_token=os.getenv('WEBHOOK_SECRET'),
+        allowed_updates=Update.ALL_TYPES,
+    )
+
+
+if __name__ == '__main__':
+    main()